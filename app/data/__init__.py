@@ -1,9 +1,9 @@
 """Data ingestion and retrieval utilities for guideline documents."""
 
 from .ingestion.pipeline import build_faiss_index, ingest_guidelines, load_faiss_index, rebuild_index
-from .ingestion.models import DocumentChunk, IngestionConfig
+from .ingestion.models import ChunkRecords, DocumentChunk, IngestionConfig
 from .emergency_detection import EMERGENCY_RESPONSE_TEMPLATE, is_emergency_query, maybe_get_emergency_response
-from .retrieval import retrieve_chunks
+from .retrieval import embed_queries, embed_query, retrieve_chunks, search_chunks
 
 __all__ = [
     "ingest_guidelines",
@@ -11,9 +11,13 @@ __all__ = [
     "rebuild_index",
     "load_faiss_index",
     "retrieve_chunks",
+    "search_chunks",
+    "embed_query",
+    "embed_queries",
     "is_emergency_query",
     "maybe_get_emergency_response",
     "EMERGENCY_RESPONSE_TEMPLATE",
+    "ChunkRecords",
     "DocumentChunk",
     "IngestionConfig",
 ]
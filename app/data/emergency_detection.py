@@ -2,46 +2,73 @@ from __future__ import annotations
 
 import re
 
+WHITESPACE_RE = re.compile(r"\s+")
+
 EMERGENCY_RESPONSE_TEMPLATE = (
     "🚨 This may be a medical emergency.\n"
     "Seek immediate in-person care now: call your local emergency number or go to the nearest emergency department.\n"
     "If the person is unconscious, has severe breathing trouble, or symptoms are rapidly worsening, call emergency services immediately."
 )
 
+RED_FLAG_PHRASES: dict[str, tuple[str, ...]] = {
+    "breathing_difficulty": (
+        "breathing difficulty",
+        "difficulty breathing",
+        "trouble breathing",
+        "shortness of breath",
+    ),
+    "facial_or_lip_swelling": ("facial swelling", "lip swelling"),
+    "loss_of_consciousness": ("loss of consciousness", "lost consciousness", "unconscious"),
+    "repeated_vomiting": ("repeated vomiting", "vomiting repeatedly"),
+    "lethargy": ("lethargy", "lethargic"),
+}
+
+# Categories that are an emergency on their own; vomiting only counts together with lethargy.
+_STANDALONE_RED_FLAGS = frozenset({"breathing_difficulty", "facial_or_lip_swelling", "loss_of_consciousness"})
+
+
+# One named group per category, so a single scan over the message reports every matched category.
+_RED_FLAG_RE = re.compile(
+    "|".join(
+        f"(?P<{category}>{'|'.join(re.escape(phrase) for phrase in phrases)})"
+        for category, phrases in RED_FLAG_PHRASES.items()
+    )
+)
+
 
 def _normalize(text: str) -> str:
-    return re.sub(r"\s+", " ", text.strip().lower())
+    return WHITESPACE_RE.sub(" ", text.strip().lower())
 
 
 def is_emergency_query(message: str) -> bool:
     """Return True when the message contains predefined emergency red flags."""
-    normalized = _normalize(message)
+    categories = _matched_categories(_normalize(message))
+    if categories & _STANDALONE_RED_FLAGS:
+        return True
+    return {"repeated_vomiting", "lethargy"} <= categories
 
-    breathing_difficulty = (
-        "breathing difficulty" in normalized
-        or "difficulty breathing" in normalized
-        or "trouble breathing" in normalized
-        or "shortness of breath" in normalized
-    )
-    facial_or_lip_swelling = "facial swelling" in normalized or "lip swelling" in normalized
-    loss_of_consciousness = (
-        "loss of consciousness" in normalized
-        or "lost consciousness" in normalized
-        or "unconscious" in normalized
-    )
 
-    repeated_vomiting = "repeated vomiting" in normalized or "vomiting repeatedly" in normalized
-    lethargy = "lethargy" in normalized or "lethargic" in normalized
-    repeated_vomiting_with_lethargy = repeated_vomiting and lethargy
-
-    return any(
-        [
-            breathing_difficulty,
-            facial_or_lip_swelling,
-            loss_of_consciousness,
-            repeated_vomiting_with_lethargy,
-        ]
-    )
+def _matched_categories(normalized: str) -> set[str]:
+    if _AUTOMATON is not None:
+        return {category for _, category in _AUTOMATON.iter(normalized)}
+    return {match.lastgroup for match in _RED_FLAG_RE.finditer(normalized)}
+
+
+def _build_automaton() -> object | None:
+    try:
+        import ahocorasick
+    except ImportError:
+        return None
+
+    automaton = ahocorasick.Automaton()
+    for category, phrases in RED_FLAG_PHRASES.items():
+        for phrase in phrases:
+            automaton.add_word(phrase, category)
+    automaton.make_automaton()
+    return automaton
+
+
+_AUTOMATON = _build_automaton()
 
 
 def maybe_get_emergency_response(message: str) -> str | None:
@@ -1,13 +1,15 @@
 """Data ingestion utilities for loading and chunking guideline documents."""
 
-from .pipeline import build_faiss_index, ingest_guidelines, load_faiss_index, rebuild_index
-from .models import DocumentChunk, IngestionConfig
+from .pipeline import build_default_embedding_client, build_faiss_index, ingest_guidelines, load_faiss_index, rebuild_index
+from .models import ChunkRecords, DocumentChunk, IngestionConfig
 
 __all__ = [
     "ingest_guidelines",
     "build_faiss_index",
+    "build_default_embedding_client",
     "rebuild_index",
     "load_faiss_index",
+    "ChunkRecords",
     "DocumentChunk",
     "IngestionConfig",
 ]
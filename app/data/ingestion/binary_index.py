@@ -0,0 +1,75 @@
+"""Binary (sign-bit) FAISS index with fp32 rescoring.
+
+The pipeline imports this module lazily, only for ``precision="binary"``. That path needs FAISS,
+which itself requires NumPy, so NumPy is imported unconditionally here.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+
+# Hamming search over sign bits is coarse, so pull this many candidates per requested hit for rescoring.
+BINARY_RESCORE_FACTOR = 10
+VECTORS_FILE_SUFFIX = ".vectors.npy"
+
+_MISSING_SCORE = -np.finfo(np.float32).max
+
+
+def pack_sign_bits(vectors: object) -> np.ndarray:
+    return np.packbits(np.asarray(vectors) > 0, axis=1)
+
+
+def build_binary_index(faiss: object, vectors: np.ndarray) -> object:
+    codes = pack_sign_bits(vectors)
+    index = faiss.IndexBinaryFlat(codes.shape[1] * 8)
+    index.add(codes)
+    return index
+
+
+def write_binary_index(faiss: object, index: object, vectors: np.ndarray, index_path: Path) -> Path:
+    """Write the packed codes plus the fp32 vectors used for rescoring; returns the vectors path."""
+    faiss.write_index_binary(index, str(index_path))
+    vectors_path = index_path.with_suffix(VECTORS_FILE_SUFFIX)
+    np.save(vectors_path, np.ascontiguousarray(vectors, dtype=np.float32))
+    return vectors_path
+
+
+def read_binary_index(faiss: object, index_path: Path, vectors_path: Path, mmap: bool = True) -> "BinaryRescoringIndex":
+    binary_index = faiss.read_index_binary(str(index_path))
+    vectors = np.load(vectors_path, mmap_mode="r" if mmap else None)
+    return BinaryRescoringIndex(binary_index, vectors)
+
+
+class BinaryRescoringIndex:
+    """Hamming search over packed sign bits, re-ranked by fp32 inner product.
+
+    Only the 1-bit codes need to stay resident; the fp32 vectors are memory-mapped and read just
+    for each query's candidates. ``search`` returns inner-product scores like ``IndexFlatIP``
+    so similarity thresholds keep their meaning.
+    """
+
+    def __init__(self, binary_index: object, vectors: np.ndarray, rescore_factor: int = BINARY_RESCORE_FACTOR) -> None:
+        self._binary_index = binary_index
+        self._vectors = vectors
+        self._rescore_factor = rescore_factor
+
+    @property
+    def ntotal(self) -> int:
+        return int(self._binary_index.ntotal)
+
+    def search(self, query_vector: object, k: int) -> tuple[np.ndarray, np.ndarray]:
+        queries = np.ascontiguousarray(query_vector, dtype=np.float32).reshape(-1, self._vectors.shape[1])
+        candidate_count = min(self.ntotal, k * self._rescore_factor)
+        _, candidates = self._binary_index.search(pack_sign_bits(queries), candidate_count)
+
+        scores = np.full((len(queries), k), _MISSING_SCORE, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (query, row_candidates) in enumerate(zip(queries, candidates)):
+            row_candidates = row_candidates[row_candidates >= 0]
+            candidate_scores = self._vectors[row_candidates] @ query
+            top = np.argsort(-candidate_scores, kind="stable")[:k]
+            scores[row, : len(top)] = candidate_scores[top]
+            ids[row, : len(top)] = row_candidates[top]
+        return scores, ids
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+from collections.abc import Iterator
+
 from .models import DocumentChunk, IngestionConfig, RawDocument
-from .text_processing import split_sections, split_sentences, token_count
+from .text_processing import TOKEN_RE, estimate_token_count, split_sections, split_sentences, token_count
 
 
 def build_chunks(document: RawDocument, config: IngestionConfig) -> list[DocumentChunk]:
@@ -10,39 +12,19 @@ def build_chunks(document: RawDocument, config: IngestionConfig) -> list[Documen
     chunk_index = 0
 
     for section in sections:
-        sentence_buffer: list[str] = []
-        sentence_tokens: list[int] = []
-
-        for sentence in split_sentences(section.text):
-            sent_tokens = token_count(sentence)
-            proposed_tokens = sum(sentence_tokens) + sent_tokens
-            if sentence_buffer and proposed_tokens > config.chunk_size_tokens:
-                chunks.append(
-                    _to_chunk(
-                        document=document,
-                        section=section.title,
-                        chunk_index=chunk_index,
-                        text=" ".join(sentence_buffer),
-                    )
-                )
-                chunk_index += 1
-
-                sentence_buffer, sentence_tokens = _apply_overlap(
-                    sentence_buffer,
-                    sentence_tokens,
-                    config.overlap_tokens,
-                )
+        if config.chunk_strategy == "window":
+            section_texts = _window_texts(section.text, config)
+        else:
+            section_texts = _sentence_texts(section.text, config)
 
-            sentence_buffer.append(sentence)
-            sentence_tokens.append(sent_tokens)
-
-        if sentence_buffer:
+        for text in section_texts:
             chunks.append(
                 _to_chunk(
                     document=document,
                     section=section.title,
                     chunk_index=chunk_index,
-                    text=" ".join(sentence_buffer),
+                    text=text,
+                    include_section_prefix=config.include_section_prefix,
                 )
             )
             chunk_index += 1
@@ -50,29 +32,73 @@ def build_chunks(document: RawDocument, config: IngestionConfig) -> list[Documen
     return chunks
 
 
+def _sentence_texts(text: str, config: IngestionConfig) -> Iterator[str]:
+    sentence_buffer: list[str] = []
+    sentence_tokens: list[int] = []
+    buffer_tokens = 0
+    count_tokens = token_count if config.exact_tokens else estimate_token_count
+
+    for sentence in split_sentences(text):
+        sent_tokens = count_tokens(sentence)
+        proposed_tokens = buffer_tokens + sent_tokens
+        if sentence_buffer and proposed_tokens > config.chunk_size_tokens:
+            yield " ".join(sentence_buffer)
+
+            sentence_buffer, sentence_tokens, buffer_tokens = _apply_overlap(
+                sentence_buffer,
+                sentence_tokens,
+                config.overlap_tokens,
+            )
+
+        sentence_buffer.append(sentence)
+        sentence_tokens.append(sent_tokens)
+        buffer_tokens += sent_tokens
+
+    if sentence_buffer:
+        yield " ".join(sentence_buffer)
+
+
+def _window_texts(text: str, config: IngestionConfig) -> Iterator[str]:
+    spans = [match.span() for match in TOKEN_RE.finditer(text)]
+    stride = max(1, config.chunk_size_tokens - config.overlap_tokens)
+
+    for start in range(0, len(spans), stride):
+        end = min(start + config.chunk_size_tokens, len(spans))
+        yield text[spans[start][0] : spans[end - 1][1]]
+        if end == len(spans):
+            break
+
+
 def _apply_overlap(
     sentence_buffer: list[str],
     sentence_tokens: list[int],
     overlap_tokens: int,
-) -> tuple[list[str], list[int]]:
-    retained_sentences: list[str] = []
-    retained_tokens: list[int] = []
+) -> tuple[list[str], list[int], int]:
     running = 0
+    cut = len(sentence_buffer)
 
-    for sentence, tokens in zip(reversed(sentence_buffer), reversed(sentence_tokens)):
+    for i in range(len(sentence_buffer) - 1, -1, -1):
+        running += sentence_tokens[i]
+        cut = i
         if running >= overlap_tokens:
             break
-        retained_sentences.insert(0, sentence)
-        retained_tokens.insert(0, tokens)
-        running += tokens
 
-    return retained_sentences, retained_tokens
+    return sentence_buffer[cut:], sentence_tokens[cut:], running
 
 
-def _to_chunk(document: RawDocument, section: str, chunk_index: int, text: str) -> DocumentChunk:
+def _to_chunk(
+    document: RawDocument,
+    section: str,
+    chunk_index: int,
+    text: str,
+    include_section_prefix: bool = False,
+) -> DocumentChunk:
     source = str(document.source)
     chunk_id = f"{document.source.stem}:{chunk_index:04d}"
-    chunk_text = f"{section}\n\n{text}" if text else section
+    if include_section_prefix:
+        chunk_text = f"{section}\n\n{text}" if text else section
+    else:
+        chunk_text = text
     return DocumentChunk(
         chunk_id=chunk_id,
         text=chunk_text,
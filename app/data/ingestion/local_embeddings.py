@@ -2,22 +2,31 @@ from __future__ import annotations
 
 import importlib
 import importlib.util
+import os
 from dataclasses import dataclass
-from typing import Sequence
+from typing import Any, Sequence
+
+ENCODE_BATCH_SIZE = 256
+LOCAL_EMBEDDING_BACKENDS = ("torch", "onnx", "openvino")
 
 
 @dataclass
 class EmbeddingItem:
-    embedding: list[float]
+    embedding: Sequence[float]
 
 
 @dataclass
 class EmbeddingResponse:
     data: list[EmbeddingItem]
+    # Raw float32 matrix for consumers that can skip per-item conversion.
+    vectors: Any = None
 
 
 class _SentenceTransformerEmbeddingsAPI:
-    def __init__(self) -> None:
+    def __init__(self, backend: str = "torch") -> None:
+        if backend not in LOCAL_EMBEDDING_BACKENDS:
+            raise ValueError(f"backend must be one of {LOCAL_EMBEDDING_BACKENDS}.")
+        self._backend = backend
         self._models: dict[str, object] = {}
 
     def _load_model(self, model: str) -> object:
@@ -26,27 +35,36 @@ class _SentenceTransformerEmbeddingsAPI:
 
         sentence_transformers = importlib.import_module("sentence_transformers")
         sentence_transformer_cls = getattr(sentence_transformers, "SentenceTransformer")
-        loaded = sentence_transformer_cls(model)
+        if self._backend == "torch":
+            loaded = sentence_transformer_cls(model)
+        else:
+            # Exported inference backends need sentence-transformers>=3.2 with the matching extra installed.
+            loaded = sentence_transformer_cls(model, backend=self._backend)
         self._models[model] = loaded
         return loaded
 
     def create(self, model: str, input: Sequence[str]) -> EmbeddingResponse:
         transformer = self._load_model(model)
-        vectors = transformer.encode(list(input), normalize_embeddings=False)
-
-        if hasattr(vectors, "tolist"):
-            vector_rows = vectors.tolist()
-        else:
-            vector_rows = vectors
-
-        return EmbeddingResponse(data=[EmbeddingItem(embedding=[float(v) for v in row]) for row in vector_rows])
+        # encode() sorts inputs by length internally, so passing the whole corpus minimizes padding.
+        vectors = transformer.encode(
+            list(input),
+            batch_size=ENCODE_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return EmbeddingResponse(data=[EmbeddingItem(embedding=row) for row in vectors], vectors=vectors)
 
 
 class SentenceTransformerEmbeddingClient:
     """OpenAI-compatible local embeddings client backed by sentence-transformers."""
 
-    def __init__(self) -> None:
-        self.embeddings = _SentenceTransformerEmbeddingsAPI()
+    # The model batches internally, so callers should pass the full input in one request.
+    handles_batching = True
+
+    def __init__(self, backend: str | None = None) -> None:
+        backend = backend or os.getenv("LOCAL_EMBEDDING_BACKEND", "torch").strip().lower()
+        self.embeddings = _SentenceTransformerEmbeddingsAPI(backend=backend)
 
 
 def sentence_transformers_available() -> bool:
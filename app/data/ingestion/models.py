@@ -1,13 +1,27 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
 from dataclasses import dataclass, field
 from pathlib import Path
 
 
+CHUNK_STRATEGIES = ("sentence", "window")
+
+
 @dataclass(slots=True)
 class IngestionConfig:
     chunk_size_tokens: int = 400
     overlap_ratio: float = 0.15
+    # "sentence" packs whole sentences per chunk; "window" slides a fixed token window over each section.
+    chunk_strategy: str = "sentence"
+    # False sizes sentence chunks with a cheap word/punctuation estimate instead of TOKEN_RE.
+    exact_tokens: bool = True
+    # The section title is always kept in metadata; prefixing it to the text repeats it in every embedding input.
+    include_section_prefix: bool = False
+
+    def __post_init__(self) -> None:
+        if self.chunk_strategy not in CHUNK_STRATEGIES:
+            raise ValueError(f"chunk_strategy must be one of {CHUNK_STRATEGIES}.")
 
     @property
     def overlap_tokens(self) -> int:
@@ -39,3 +53,72 @@ class DocumentChunk:
             "text": self.text,
             "metadata": self.metadata,
         }
+
+
+@dataclass(slots=True)
+class ChunkRecords(Sequence):
+    """Columnar store of indexed chunks; row dicts are only built for the rows that are accessed."""
+
+    ids: list[str]
+    texts: list[str]
+    metadata: dict[str, list[object]] = field(default_factory=dict)
+    # Rows whose record lacked a metadata key; their column holds None, which is not dropped for other rows.
+    missing: dict[str, set[int]] = field(default_factory=dict)
+
+    @classmethod
+    def from_records(cls, records: Sequence[dict[str, object]]) -> "ChunkRecords":
+        metadata_keys: dict[str, None] = {}
+        for record in records:
+            metadata_keys.update(dict.fromkeys(record.get("metadata", {}) or {}))
+
+        metadata: dict[str, list[object]] = {key: [] for key in metadata_keys}
+        missing: dict[str, set[int]] = {}
+        for row, record in enumerate(records):
+            record_metadata = record.get("metadata", {}) or {}
+            for key, column in metadata.items():
+                if key in record_metadata:
+                    column.append(record_metadata[key])
+                else:
+                    column.append(None)
+                    missing.setdefault(key, set()).add(row)
+
+        return cls(
+            ids=[str(record["id"]) for record in records],
+            texts=[str(record["text"]) for record in records],
+            metadata=metadata,
+            missing=missing,
+        )
+
+    @classmethod
+    def from_columns(cls, columns: dict[str, object]) -> "ChunkRecords":
+        return cls(
+            ids=columns["ids"],
+            texts=columns["texts"],
+            metadata=columns.get("metadata", {}),
+            missing={key: set(rows) for key, rows in columns.get("missing", {}).items()},
+        )
+
+    def to_columns(self) -> dict[str, object]:
+        return {
+            "ids": self.ids,
+            "texts": self.texts,
+            "metadata": self.metadata,
+            "missing": {key: sorted(rows) for key, rows in self.missing.items()},
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        position = range(len(self))[position]
+        return {
+            "id": self.ids[position],
+            "text": self.texts[position],
+            "metadata": {
+                key: column[position]
+                for key, column in self.metadata.items()
+                if position not in self.missing.get(key, ())
+            },
+        }
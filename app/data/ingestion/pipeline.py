@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-import json
 import logging
+import math
 import os
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
 try:
@@ -13,8 +15,9 @@ except ImportError:  # pragma: no cover - dependency wiring is environment-speci
 
 from .chunker import build_chunks
 from .loaders import load_guideline_documents
-from .models import IngestionConfig
+from .models import ChunkRecords, IngestionConfig, RawDocument
 from .local_embeddings import SentenceTransformerEmbeddingClient, sentence_transformers_available
+from .storage import pyarrow_available, read_json, read_parquet_records, write_json, write_parquet_records
 from .text_processing import clean_text
 
 
@@ -22,6 +25,29 @@ logger = logging.getLogger(__name__)
 
 DEFAULT_LOCAL_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
+# Exhaustive search is fastest for small corpora; switch to approximate indexes as the corpus grows.
+INDEX_TYPES = ("flat", "hnsw", "ivf", "ivfpq")
+PRECISIONS = ("fp32", "fp16", "int8", "binary")
+HNSW_MIN_VECTORS = 10_000
+IVF_MIN_VECTORS = 1_000_000
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+IVF_NPROBE = 16
+INVLISTS_FILE_SUFFIX = ".ivfdata"
+# Chunk records go inline in the metadata JSON or into a memory-mappable Parquet file next to it.
+RECORDS_FORMATS = ("json", "parquet")
+# Opt-in OPQ+IVF+PQ compresses each vector to this many bytes (or fewer for small dimensions).
+PQ_MAX_SUBQUANTIZERS = 64
+# 8-bit PQ codebooks need at least one training vector per centroid.
+PQ_MIN_TRAINING_VECTORS = 256
+
+EMBEDDING_BATCH_SIZE = 512
+EMBEDDING_MAX_WORKERS = 4
+
+# Below this many documents the process-pool startup costs more than it saves.
+PARALLEL_INGEST_MIN_DOCUMENTS = 8
+
 
 def _get_faiss_module():
     try:
@@ -31,7 +57,8 @@ def _get_faiss_module():
     return faiss
 
 
-def _build_default_embedding_client(model: str) -> tuple[object, str]:
+def build_default_embedding_client(model: str) -> tuple[object, str]:
+    """Return ``(client, model)`` for the best available embedding backend."""
     if model.startswith("local:"):
         local_model = model.split(":", maxsplit=1)[1] or DEFAULT_LOCAL_EMBEDDING_MODEL
         return SentenceTransformerEmbeddingClient(), local_model
@@ -51,26 +78,155 @@ def _build_default_embedding_client(model: str) -> tuple[object, str]:
     )
 
 
+def _request_embedding_batches(
+    texts: list[str],
+    model: str,
+    embedding_client: OpenAI | object,
+    batch_size: int,
+) -> list[tuple[int, object]]:
+    if getattr(embedding_client, "handles_batching", False):
+        batch_size = max(batch_size, len(texts))
+
+    starts = list(range(0, len(texts), batch_size))
+
+    def request(start: int) -> tuple[int, object]:
+        return start, embedding_client.embeddings.create(model=model, input=texts[start : start + batch_size])
+
+    if len(starts) <= 1:
+        return [request(start) for start in starts]
+
+    with ThreadPoolExecutor(max_workers=min(EMBEDDING_MAX_WORKERS, len(starts))) as executor:
+        return list(executor.map(request, starts))
+
+
 def _embed_texts(
     texts: list[str],
     model: str,
     embedding_client: OpenAI | object | None,
-    batch_size: int = 128,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
 ) -> object:
     if embedding_client is None:
-        embedding_client, model = _build_default_embedding_client(model)
+        embedding_client, model = build_default_embedding_client(model)
 
-    vectors: list[list[float]] = []
-    for i in range(0, len(texts), batch_size):
-        response = embedding_client.embeddings.create(model=model, input=texts[i : i + batch_size])
-        vectors.extend(item.embedding for item in response.data)
+    responses = _request_embedding_batches(texts, model, embedding_client, batch_size)
 
     try:
         import numpy as np
     except ImportError:  # pragma: no cover - optional for test/runtime flexibility.
+        vectors: list[list[float]] = []
+        for _, response in responses:
+            vectors.extend(item.embedding for item in response.data)
+        if len(vectors) != len(texts):
+            raise ValueError(f"Embedding client returned {len(vectors)} vectors for {len(texts)} inputs.")
         return vectors
 
-    return np.asarray(vectors, dtype=np.float32)
+    matrix = None
+    ends = [start for start, _ in responses[1:]] + [len(texts)]
+    for (start, response), end in zip(responses, ends):
+        batch = getattr(response, "vectors", None)
+        if batch is None:
+            batch = [item.embedding for item in response.data]
+        if len(batch) != end - start:
+            raise ValueError(f"Embedding client returned {len(batch)} vectors for {end - start} inputs.")
+        if not len(batch):
+            continue
+        if matrix is None:
+            matrix = np.empty((len(texts), len(batch[0])), dtype=np.float32)
+        # Rows (lists or arrays) are converted straight into the float32 slice, with no temporary array.
+        matrix[start:end] = batch
+
+    if matrix is None:
+        return np.empty((0, 0), dtype=np.float32)
+    return matrix
+
+
+def _select_index_type(vector_count: int) -> str:
+    if vector_count >= IVF_MIN_VECTORS:
+        return "ivf"
+    if vector_count >= HNSW_MIN_VECTORS:
+        return "hnsw"
+    return "flat"
+
+
+def _scalar_quantizer_type(faiss: object, precision: str) -> object | None:
+    if precision == "fp32":
+        return None
+    if precision == "fp16":
+        return faiss.ScalarQuantizer.QT_fp16
+    if precision == "int8":
+        return faiss.ScalarQuantizer.QT_8bit
+    raise ValueError(f"Unsupported precision: {precision!r}.")
+
+
+def _ivf_list_count(vector_count: int) -> int:
+    return max(1, int(4 * math.sqrt(vector_count)))
+
+
+def _pq_subquantizer_count(dimension: int) -> int:
+    return next(m for m in range(min(PQ_MAX_SUBQUANTIZERS, dimension), 0, -1) if dimension % m == 0)
+
+
+def _create_index(
+    faiss: object,
+    index_type: str,
+    dimension: int,
+    vectors: object,
+    precision: str = "fp32",
+    invlists_path: Path | None = None,
+) -> object:
+    sq_type = _scalar_quantizer_type(faiss, precision)
+
+    if index_type == "flat":
+        if sq_type is None:
+            index = faiss.IndexFlatIP(dimension)
+        else:
+            index = faiss.IndexScalarQuantizer(dimension, sq_type, faiss.METRIC_INNER_PRODUCT)
+    elif index_type == "hnsw":
+        if sq_type is None:
+            index = faiss.IndexHNSWFlat(dimension, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexHNSWSQ(dimension, sq_type, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif index_type == "ivf":
+        nlist = _ivf_list_count(len(vectors))
+        quantizer = faiss.IndexFlatIP(dimension)
+        if sq_type is None:
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFScalarQuantizer(
+                quantizer, dimension, nlist, sq_type, faiss.METRIC_INNER_PRODUCT
+            )
+    elif index_type == "ivfpq":
+        if sq_type is not None:
+            raise ValueError("ivfpq indexes are already product-quantized; use precision='fp32'.")
+        if len(vectors) < PQ_MIN_TRAINING_VECTORS:
+            raise ValueError(f"ivfpq needs at least {PQ_MIN_TRAINING_VECTORS} vectors to train; got {len(vectors)}.")
+        subquantizers = _pq_subquantizer_count(dimension)
+        spec = f"OPQ{subquantizers},IVF{_ivf_list_count(len(vectors))},PQ{subquantizers}"
+        index = faiss.index_factory(dimension, spec, faiss.METRIC_INNER_PRODUCT)
+    else:
+        raise ValueError(f"Unsupported index_type: {index_type!r}.")
+
+    # IVF centroids, PQ codebooks and scalar-quantizer ranges are learned from the corpus itself.
+    if index_type in ("ivf", "ivfpq") or sq_type is not None:
+        index.train(vectors)
+    if invlists_path is not None:
+        invlists_path.unlink(missing_ok=True)
+        invlists = faiss.OnDiskInvertedLists(index.nlist, index.code_size, str(invlists_path))
+        index.replace_invlists(invlists, True)
+        invlists.this.disown()
+    index.add(vectors)
+    return index
+
+
+def _apply_search_params(faiss: object, index: object, index_type: str) -> None:
+    if index_type == "hnsw":
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    elif index_type == "ivf":
+        index.nprobe = IVF_NPROBE
+    elif index_type == "ivfpq":
+        # The OPQ rotation wraps the IVF index, so reach through it to set nprobe.
+        faiss.extract_index_ivf(index).nprobe = IVF_NPROBE
 
 
 def build_faiss_index(
@@ -78,59 +234,128 @@ def build_faiss_index(
     output_dir: str | Path,
     embedding_model: str = "text-embedding-3-small",
     embedding_client: OpenAI | object | None = None,
+    index_type: str | None = None,
+    precision: str = "fp32",
+    embed_batch_size: int = EMBEDDING_BATCH_SIZE,
+    ondisk_ivf: bool = False,
+    records_format: str = "json",
 ) -> tuple[Path, Path]:
+    """Embed the records and write the FAISS index plus its metadata; returns both paths.
+
+    ``ondisk_ivf`` keeps an IVF index's posting lists in a separate ``.ivfdata`` file that is
+    memory-mapped at load time, so only probed lists are paged in.
+
+    ``records_format`` stores the chunk records inline in the metadata JSON (the default) or, with
+    ``"parquet"``, in a memory-mappable Parquet file; Parquet needs pyarrow to build and to load.
+    """
     if not embedding_records:
         raise ValueError("embedding_records must not be empty.")
+    if embed_batch_size <= 0:
+        raise ValueError("embed_batch_size must be greater than zero.")
+    if records_format not in RECORDS_FORMATS:
+        raise ValueError(f"Unsupported records_format: {records_format!r}.")
+    if records_format == "parquet" and not pyarrow_available():
+        raise RuntimeError("pyarrow is required for records_format='parquet'. Install pyarrow.")
 
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
 
-    texts = [str(record["text"]) for record in embedding_records]
-    metadata = [
-        {
-            "id": record["id"],
-            "metadata": record.get("metadata", {}),
-            "text": record["text"],
-        }
-        for record in embedding_records
-    ]
+    records = ChunkRecords.from_records(embedding_records)
+    texts = records.texts
 
     logger.info("Building embeddings for %d chunks.", len(texts))
     started_at = time.perf_counter()
-    vectors = _embed_texts(texts, model=embedding_model, embedding_client=embedding_client)
+    vectors = _embed_texts(texts, model=embedding_model, embedding_client=embedding_client, batch_size=embed_batch_size)
     elapsed = time.perf_counter() - started_at
     logger.info("Embedding generation completed in %.3f seconds.", elapsed)
 
     faiss = _get_faiss_module()
     faiss.normalize_L2(vectors)
     dimension = len(vectors[0]) if isinstance(vectors, list) else vectors.shape[1]
-    index = faiss.IndexFlatIP(dimension)
-    index.add(vectors)
+    if precision == "binary" and index_type not in (None, "flat"):
+        raise ValueError("binary precision is only supported with index_type='flat'.")
+    index_type = "flat" if precision == "binary" else index_type or _select_index_type(len(vectors))
+    if ondisk_ivf and index_type != "ivf":
+        raise ValueError(f"ondisk_ivf requires index_type='ivf'; got {index_type!r}.")
 
     index_path = output_path / "guidelines.index"
     metadata_path = output_path / "guidelines_metadata.json"
-
-    faiss.write_index(index, str(index_path))
-    metadata_path.write_text(
-        json.dumps(
-            {
-                "embedding_model": embedding_model,
-                "dimension": int(dimension),
-                "records": metadata,
-            },
-            ensure_ascii=False,
-            indent=2,
-        ),
-        encoding="utf-8",
-    )
+    payload: dict[str, object] = {
+        "embedding_model": embedding_model,
+        "dimension": int(dimension),
+        "index_type": index_type,
+        "precision": precision,
+    }
+
+    if precision == "binary":
+        from .binary_index import build_binary_index, write_binary_index
+
+        index = build_binary_index(faiss, vectors)
+        payload["vectors_file"] = write_binary_index(faiss, index, vectors, index_path).name
+    else:
+        invlists_path = index_path.with_suffix(INVLISTS_FILE_SUFFIX) if ondisk_ivf else None
+        index = _create_index(faiss, index_type, dimension, vectors, precision, invlists_path)
+        faiss.write_index(index, str(index_path))
+        if invlists_path is not None:
+            payload["invlists_file"] = invlists_path.name
+    logger.info("Built %s/%s FAISS index with %d vectors.", index_type, precision, len(vectors))
+
+    if records_format == "parquet":
+        records_path = output_path / "guidelines_metadata.parquet"
+        write_parquet_records(records, records_path)
+        payload["records_file"] = records_path.name
+    else:
+        payload["records"] = records.to_columns()
+
+    write_json(payload, metadata_path)
 
     return index_path, metadata_path
 
 
-def load_faiss_index(index_path: str | Path, metadata_path: str | Path) -> tuple[object, dict[str, object]]:
+def _read_index(faiss: object, index_path: str | Path, index_type: str) -> object:
+    """Memory-map the index's vector storage read-only so pages load on demand and are shared between processes.
+
+    IO_FLAG_MMAP only maps the posting lists of IVF indexes; flat and HNSW codes need IO_FLAG_MMAP_IFC,
+    which older FAISS releases lack, so there those indexes are read into memory.
+    """
+    flag_name = "IO_FLAG_MMAP" if index_type in ("ivf", "ivfpq") else "IO_FLAG_MMAP_IFC"
+    mmap_flag = getattr(faiss, flag_name, None)
+    if mmap_flag is None:
+        return faiss.read_index(str(index_path))
+
+    try:
+        return faiss.read_index(str(index_path), mmap_flag | getattr(faiss, "IO_FLAG_READ_ONLY", 0))
+    except RuntimeError:
+        logger.warning("FAISS cannot memory-map %s; reading it into memory instead.", index_path)
+        return faiss.read_index(str(index_path))
+
+
+def load_faiss_index(
+    index_path: str | Path,
+    metadata_path: str | Path,
+    mmap: bool = True,
+) -> tuple[object, dict[str, object]]:
     faiss = _get_faiss_module()
-    loaded_index = faiss.read_index(str(index_path))
-    loaded_metadata = json.loads(Path(metadata_path).read_text(encoding="utf-8"))
+    loaded_metadata = read_json(metadata_path)
+    index_type = str(loaded_metadata.get("index_type", "flat"))
+    if loaded_metadata.get("precision") == "binary":
+        from .binary_index import read_binary_index
+
+        vectors_path = Path(metadata_path).parent / loaded_metadata["vectors_file"]
+        loaded_index = read_binary_index(faiss, Path(index_path), vectors_path, mmap=mmap)
+    elif "invlists_file" in loaded_metadata:
+        # On-disk posting lists are always mmapped (IO_FLAG_MMAP on top of them crashes FAISS), and they
+        # record their build-time path, so resolve the data file next to the index instead.
+        if not mmap:
+            raise ValueError("Indexes built with ondisk_ivf are always memory-mapped; load them with mmap=True.")
+        loaded_index = faiss.read_index(str(index_path), faiss.IO_FLAG_ONDISK_SAME_DIR | faiss.IO_FLAG_READ_ONLY)
+    else:
+        loaded_index = _read_index(faiss, index_path, index_type) if mmap else faiss.read_index(str(index_path))
+    if "records_file" in loaded_metadata:
+        loaded_metadata["records"] = read_parquet_records(Path(metadata_path).parent / loaded_metadata["records_file"])
+    elif isinstance(loaded_metadata.get("records"), dict):
+        loaded_metadata["records"] = ChunkRecords.from_columns(loaded_metadata["records"])
+    _apply_search_params(faiss, loaded_index, index_type)
     return loaded_index, loaded_metadata
 
 
@@ -140,6 +365,11 @@ def rebuild_index(
     config: IngestionConfig | None = None,
     embedding_model: str = "text-embedding-3-small",
     embedding_client: OpenAI | object | None = None,
+    index_type: str | None = None,
+    precision: str = "fp32",
+    embed_batch_size: int = EMBEDDING_BATCH_SIZE,
+    ondisk_ivf: bool = False,
+    records_format: str = "json",
 ) -> tuple[Path, Path]:
     records = ingest_guidelines(source_path, config=config)
     return build_faiss_index(
@@ -147,6 +377,11 @@ def rebuild_index(
         output_dir=output_dir,
         embedding_model=embedding_model,
         embedding_client=embedding_client,
+        index_type=index_type,
+        precision=precision,
+        embed_batch_size=embed_batch_size,
+        ondisk_ivf=ondisk_ivf,
+        records_format=records_format,
     )
 
 
@@ -154,10 +389,19 @@ def ingest_guidelines(path: str | Path, config: IngestionConfig | None = None) -
     config = config or IngestionConfig()
     documents = load_guideline_documents(path)
 
-    embedding_records: list[dict[str, object]] = []
-    for document in documents:
-        document.text = clean_text(document.text)
-        chunks = build_chunks(document, config)
-        embedding_records.extend(chunk.as_embedding_record() for chunk in chunks)
+    if len(documents) < PARALLEL_INGEST_MIN_DOCUMENTS:
+        per_document = [_process_document(document, config) for document in documents]
+    else:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            per_document = list(executor.map(_process_document, documents, repeat(config), chunksize=4))
 
+    embedding_records: list[dict[str, object]] = []
+    for records in per_document:
+        embedding_records.extend(records)
     return embedding_records
+
+
+def _process_document(document: RawDocument, config: IngestionConfig) -> list[dict[str, object]]:
+    document.text = clean_text(document.text)
+    chunks = build_chunks(document, config)
+    return [chunk.as_embedding_record() for chunk in chunks]
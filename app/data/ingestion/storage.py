@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+from collections.abc import Sequence
+from pathlib import Path
+
+from .models import ChunkRecords
+
+PARQUET_METADATA_PREFIX = "metadata."
+# Schema metadata key holding ChunkRecords.missing, so nulls for absent keys are told apart from stored Nones.
+PARQUET_MISSING_KEY = b"chunk_records.missing"
+
+
+def pyarrow_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def write_json(payload: dict[str, object], path: str | Path) -> None:
+    try:
+        import orjson
+    except ImportError:
+        # json.dump streams encoder chunks to the file instead of building the whole document in memory.
+        with Path(path).open("w", encoding="utf-8") as file:
+            json.dump(payload, file, ensure_ascii=False)
+        return
+
+    Path(path).write_bytes(orjson.dumps(payload))
+
+
+def read_json(path: str | Path) -> dict[str, object]:
+    try:
+        import orjson
+    except ImportError:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    return orjson.loads(Path(path).read_bytes())
+
+
+def write_parquet_records(records: ChunkRecords, path: str | Path) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns: dict[str, list[object]] = {"id": records.ids, "text": records.texts}
+    for key, values in records.metadata.items():
+        columns[f"{PARQUET_METADATA_PREFIX}{key}"] = values
+    table = pa.table(columns)
+    missing = {key: sorted(rows) for key, rows in records.missing.items()}
+    pq.write_table(table.replace_schema_metadata({PARQUET_MISSING_KEY: json.dumps(missing)}), str(path))
+
+
+def read_parquet_records(path: str | Path) -> "ArrowChunkRecords":
+    import pyarrow.parquet as pq
+
+    return ArrowChunkRecords(pq.read_table(str(path), memory_map=True))
+
+
+class ArrowChunkRecords(Sequence):
+    """Read-only record view over a memory-mapped Arrow table; rows are converted on access."""
+
+    def __init__(self, table: object) -> None:
+        self._ids = table.column("id")
+        self._texts = table.column("text")
+        self._metadata = {
+            name[len(PARQUET_METADATA_PREFIX) :]: table.column(name)
+            for name in table.column_names
+            if name.startswith(PARQUET_METADATA_PREFIX)
+        }
+        raw_missing = (table.schema.metadata or {}).get(PARQUET_MISSING_KEY, b"{}")
+        self._missing = {key: set(rows) for key, rows in json.loads(raw_missing).items()}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("record index out of range")
+
+        metadata: dict[str, object] = {}
+        for key, column in self._metadata.items():
+            if position not in self._missing.get(key, ()):
+                metadata[key] = column[position].as_py()
+        return {
+            "id": self._ids[position].as_py(),
+            "text": self._texts[position].as_py(),
+            "metadata": metadata,
+        }
@@ -1,13 +1,96 @@
 from __future__ import annotations
 
 import logging
+import weakref
+from collections.abc import Sequence
+from functools import lru_cache
 from typing import Any
 
 from .ingestion.pipeline import _embed_texts
+from .ingestion.text_processing import WHITESPACE_RE
 
 
 logger = logging.getLogger(__name__)
 
+QUERY_EMBEDDING_CACHE_SIZE = 2048
+
+
+class _ClientKey:
+    """Cache key for an embedding client: compares by identity and holds the client only weakly.
+
+    The query cache must not keep clients alive; entries for a collected client can never match
+    again and age out of the LRU.
+    """
+
+    __slots__ = ("_client_id", "_ref")
+
+    def __init__(self, client: object | None) -> None:
+        self._client_id = id(client)
+        # Raises TypeError for clients that cannot be weakly referenced.
+        self._ref = weakref.ref(client) if client is not None else None
+
+    @property
+    def client(self) -> object | None:
+        return self._ref() if self._ref is not None else None
+
+    def __hash__(self) -> int:
+        return self._client_id
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, _ClientKey)
+            and self._client_id == other._client_id
+            and (self._ref is None) == (other._ref is None)
+            and self.client is other.client
+        )
+
+
+def _normalize_query(query: str) -> str:
+    return WHITESPACE_RE.sub(" ", query.strip())
+
+
+@lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)
+def _embed_query_cached(query: str, embedding_model: str, client_key: _ClientKey) -> bytes | tuple[float, ...]:
+    vectors = _embed_texts([query], model=embedding_model, embedding_client=client_key.client)
+    if hasattr(vectors, "tobytes"):
+        return vectors[0].tobytes()
+    return tuple(float(value) for value in vectors[0])
+
+
+def embed_query(
+    query: str,
+    embedding_model: str = "text-embedding-3-small",
+    embedding_client: object | None = None,
+) -> object:
+    """Embed a single query, reusing cached vectors for repeated (whitespace-normalized) queries."""
+    normalized = _normalize_query(query)
+    try:
+        client_key = _ClientKey(embedding_client)
+    except TypeError:  # Client cannot be weakly referenced; embed without caching.
+        return _embed_texts([normalized], model=embedding_model, embedding_client=embedding_client)
+
+    vector = _embed_query_cached(normalized, embedding_model, client_key)
+
+    if isinstance(vector, bytes):
+        import numpy as np
+
+        # Copy so callers may normalize the query in place without touching the cached bytes.
+        return np.frombuffer(vector, dtype=np.float32).reshape(1, -1).copy()
+    return [list(vector)]
+
+
+def embed_queries(
+    queries: list[str],
+    embedding_model: str = "text-embedding-3-small",
+    embedding_client: object | None = None,
+) -> object:
+    """Embed many queries with batched embedding requests; returns one row per query.
+
+    Queries are whitespace-normalized exactly like ``embed_query``, so both paths embed the same text.
+    """
+    normalized = [_normalize_query(query) for query in queries]
+    return _embed_texts(normalized, model=embedding_model, embedding_client=embedding_client)
+
 
 def retrieve_chunks(
     query: str,
@@ -20,48 +103,79 @@ def retrieve_chunks(
 ) -> dict[str, object]:
     if not query.strip():
         raise ValueError("query must not be empty.")
-    if top_k <= 0:
-        raise ValueError("top_k must be greater than zero.")
+    _validate_search_args(metadata, top_k)
 
-    records = metadata.get("records")
-    if not isinstance(records, list) or not records:
-        raise ValueError("metadata['records'] must contain indexed records.")
+    query_vector = embed_query(query, embedding_model=embedding_model, embedding_client=embedding_client)
+    return search_chunks(
+        query=query,
+        query_vector=query_vector,
+        index=index,
+        metadata=metadata,
+        top_k=top_k,
+        min_similarity=min_similarity,
+    )
 
-    query_vector = _embed_texts([query], model=embedding_model, embedding_client=embedding_client)
+
+def search_chunks(
+    query: str,
+    query_vector: object,
+    index: Any,
+    metadata: dict[str, object],
+    top_k: int = 5,
+    min_similarity: float = 0.75,
+) -> dict[str, object]:
+    """Search the index with an already-embedded query; ``query`` is only echoed and logged.
+
+    Every retrieved item carries a ``metadata`` dict (empty when the record has none).
+    """
+    records = _validate_search_args(metadata, top_k)
 
     try:
         import numpy as np
+    except ImportError:  # pragma: no cover - optional runtime dependency for pure unit tests.
+        np = None
 
-        if isinstance(query_vector, list):
-            query_vector = np.asarray(query_vector, dtype=np.float32)
-
-        import faiss
+    if np is not None:
+        query_vector = np.ascontiguousarray(query_vector, dtype=np.float32).reshape(1, -1)
+        try:
+            import faiss
 
-        faiss.normalize_L2(query_vector)
-    except ImportError:  # pragma: no cover - optional runtime dependency for pure unit tests.
-        pass
+            faiss.normalize_L2(query_vector)
+        except ImportError:  # pragma: no cover - optional runtime dependency for pure unit tests.
+            pass
 
     requested_k = min(top_k, len(records))
     distances, indices = index.search(query_vector, requested_k)
 
-    score_row = distances[0].tolist() if hasattr(distances[0], "tolist") else list(distances[0])
-    idx_row = indices[0].tolist() if hasattr(indices[0], "tolist") else list(indices[0])
+    if np is not None:
+        idx_row = np.asarray(indices[0])
+        scores = np.asarray(distances[0])
+        valid = idx_row >= 0
+        hit_indices = idx_row[valid].tolist()
+        hit_scores = scores[valid].tolist()
+        score_row = scores.tolist()
+    else:
+        score_row = list(distances[0])
+        hits = [(chunk_index, score) for chunk_index, score in zip(indices[0], score_row) if chunk_index >= 0]
+        hit_indices = [chunk_index for chunk_index, _ in hits]
+        hit_scores = [float(score) for _, score in hits]
 
     retrieved: list[dict[str, object]] = []
     retrieved_chunk_ids: list[str] = []
-    for rank, chunk_index in enumerate(idx_row):
-        if chunk_index < 0:
-            continue
+    for chunk_index, score in zip(hit_indices, hit_scores):
         record = records[chunk_index]
         chunk_id = str(record["id"])
-        score = float(score_row[rank])
+        # Callers rely on "metadata" always being a dict, so coerce it once here.
+        chunk_metadata = record.get("metadata")
+        if not isinstance(chunk_metadata, dict):
+            chunk_metadata = {}
 
         retrieved_chunk_ids.append(chunk_id)
         retrieved.append(
             {
                 "id": chunk_id,
                 "text": record.get("text", ""),
-                "metadata": record.get("metadata", {}),
+                "metadata": chunk_metadata,
                 "similarity": score,
             }
         )
@@ -89,3 +203,13 @@ def retrieve_chunks(
         "max_similarity": max_similarity,
         "rejected": False,
     }
+
+
+def _validate_search_args(metadata: dict[str, object], top_k: int) -> Sequence[dict[str, object]]:
+    if top_k <= 0:
+        raise ValueError("top_k must be greater than zero.")
+
+    records = metadata.get("records")
+    if not isinstance(records, Sequence) or isinstance(records, str) or not records:
+        raise ValueError("metadata['records'] must contain indexed records.")
+    return records
@@ -1,12 +1,46 @@
 from __future__ import annotations
 
+import asyncio
 import csv
+import logging
+import re
+import sys
 import time
-from dataclasses import dataclass
+from array import array
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
 from pathlib import Path
-from statistics import mean
+from statistics import mean, quantiles
 
-from app.data.retrieval import retrieve_chunks
+from app.data.retrieval import embed_queries, retrieve_chunks, search_chunks
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 10
+
+SECTION_ALIASES: dict[str, tuple[str, ...]] = {
+    "definition": ("تعريف", "cmpa", "lactose"),
+    "ingredients": ("casein", "whey", "مكونات", "ملصق"),
+    "alternatives": ("بدائل", "حليب", "تركيبة", "soy", "oat"),
+    "diagnosis": ("تشخيص", "ige", "اختبارات", "التاريخ"),
+    "management": ("إدارة", "تجنب", "نمو", "متابعة"),
+    "red_flags": ("علامات حمراء", "تأق", "إسعاف", "anaphylaxis"),
+    "symptom_checker": ("rule", "تصنيف", "خفيف", "متوسط", "شديد"),
+    "food_diary": ("يومية", "food diary", "التاريخ", "الوجبة"),
+    "recipes": ("الوصفة", "مكونات", "التحضير", "ملاءمة العمر"),
+    "medical_recommendations": ("wao", "aaaai", "تحدي غذائي", "إحالة"),
+}
+
+# One alternation per section so each match is a single scan of the (already lowercased) haystack.
+_SECTION_PATTERNS: dict[str, re.Pattern[str]] = {
+    section: re.compile("|".join(re.escape(alias.lower()) for alias in aliases))
+    for section, aliases in SECTION_ALIASES.items()
+}
+
+
+# Matches nothing, so a question without keywords never counts as a hit.
+_NEVER_MATCHES = re.compile(r"(?!)")
 
 
 @dataclass(frozen=True)
@@ -14,6 +48,13 @@ class GoldQuestion:
     question: str
     expected_keywords: tuple[str, ...]
     expected_section: str
+    keyword_pattern: re.Pattern[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        pattern = _NEVER_MATCHES
+        if self.expected_keywords:
+            pattern = re.compile("|".join(re.escape(keyword) for keyword in self.expected_keywords))
+        object.__setattr__(self, "keyword_pattern", pattern)
 
 
 @dataclass(frozen=True)
@@ -24,6 +65,8 @@ class EvaluationMetrics:
     refusal_rate: float
     avg_response_time_ms: float
     p95_response_time_ms: float
+    # Questions evaluated at once while timing; latencies are only comparable at equal concurrency.
+    concurrency: int = 1
 
 
 def load_gold_questions(csv_path: str | Path) -> list[GoldQuestion]:
@@ -31,18 +74,30 @@ def load_gold_questions(csv_path: str | Path) -> list[GoldQuestion]:
     questions: list[GoldQuestion] = []
 
     with path.open("r", newline="", encoding="utf-8") as file:
-        reader = csv.DictReader(file)
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return questions
+        columns = {name.strip(): position for position, name in enumerate(header)}
+        question_col = columns["question"]
+        keywords_col = columns["expected_keywords"]
+        section_col = columns["expected_section"]
+
         for row in reader:
+            if not row:
+                continue
+            # Sections and keywords repeat across rows; interning shares one string per value and
+            # lets the SECTION_ALIASES lookup hit CPython's identity fast path.
             keywords = tuple(
-                keyword.strip().lower()
-                for keyword in row["expected_keywords"].split(",")
+                sys.intern(keyword.strip().lower())
+                for keyword in row[keywords_col].split(",")
                 if keyword.strip()
             )
             questions.append(
                 GoldQuestion(
-                    question=row["question"].strip(),
+                    question=row[question_col].strip(),
                     expected_keywords=keywords,
-                    expected_section=row["expected_section"].strip().lower(),
+                    expected_section=sys.intern(row[section_col].strip().lower()),
                 )
             )
 
@@ -58,44 +113,169 @@ def evaluate_retrieval(
     embedding_client: object,
     top_k: int,
     min_similarity: float,
+    precomputed_embeddings: bool = True,
+    max_concurrency: int = 1,
+) -> EvaluationMetrics:
+    """Score retrieval against the gold set.
+
+    With ``precomputed_embeddings`` all questions are embedded up front in batched requests and the
+    reported latencies cover the FAISS search only; pass False to time the full per-query path.
+    Questions run one at a time by default so latencies are uncontended; ``max_concurrency`` > 1
+    runs them on worker threads, except inside a running event loop, where evaluation falls back to
+    sequential (await ``evaluate_retrieval_async`` there instead).
+    """
+    _validate_evaluation_args(gold_questions, max_concurrency)
+    if max_concurrency > 1:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(
+                evaluate_retrieval_async(
+                    gold_questions,
+                    index,
+                    metadata,
+                    embedding_model=embedding_model,
+                    embedding_client=embedding_client,
+                    top_k=top_k,
+                    min_similarity=min_similarity,
+                    precomputed_embeddings=precomputed_embeddings,
+                    max_concurrency=max_concurrency,
+                )
+            )
+        logger.warning("evaluate_retrieval called inside a running event loop; evaluating sequentially.")
+
+    query_vectors = None
+    if precomputed_embeddings:
+        query_vectors = embed_queries(
+            [case.question for case in gold_questions],
+            embedding_model=embedding_model,
+            embedding_client=embedding_client,
+        )
+
+    response_times_ns = array("q", [0]) * len(gold_questions)
+    run_case = _case_runner(
+        index, metadata, embedding_model, embedding_client, top_k, min_similarity, query_vectors, response_times_ns
+    )
+    outcomes = [run_case(position, case) for position, case in enumerate(gold_questions)]
+    return _summarize(gold_questions, outcomes, response_times_ns, concurrency=1)
+
+
+async def evaluate_retrieval_async(
+    gold_questions: list[GoldQuestion],
+    index: object,
+    metadata: dict[str, object],
+    *,
+    embedding_model: str,
+    embedding_client: object,
+    top_k: int,
+    min_similarity: float,
+    precomputed_embeddings: bool = True,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
 ) -> EvaluationMetrics:
+    """Async variant of ``evaluate_retrieval``; runs up to ``max_concurrency`` questions at once.
+
+    Latencies are then measured under that load; the metrics record the concurrency used.
+    """
+    _validate_evaluation_args(gold_questions, max_concurrency)
+
+    query_vectors = None
+    if precomputed_embeddings:
+        query_vectors = await asyncio.to_thread(
+            embed_queries,
+            [case.question for case in gold_questions],
+            embedding_model=embedding_model,
+            embedding_client=embedding_client,
+        )
+
+    # Preallocated int64 nanoseconds; each worker writes only its own slot.
+    response_times_ns = array("q", [0]) * len(gold_questions)
+    run_case = _case_runner(
+        index, metadata, embedding_model, embedding_client, top_k, min_similarity, query_vectors, response_times_ns
+    )
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def evaluate_case(position: int, case: GoldQuestion) -> dict[str, object]:
+        async with semaphore:
+            return await asyncio.to_thread(run_case, position, case)
+
+    outcomes = await asyncio.gather(
+        *(evaluate_case(position, case) for position, case in enumerate(gold_questions))
+    )
+    return _summarize(gold_questions, outcomes, response_times_ns, concurrency=max_concurrency)
+
+
+def _validate_evaluation_args(gold_questions: list[GoldQuestion], max_concurrency: int) -> None:
     if not gold_questions:
         raise ValueError("gold_questions must not be empty.")
+    if max_concurrency <= 0:
+        raise ValueError("max_concurrency must be greater than zero.")
+
 
+def _case_runner(
+    index: object,
+    metadata: dict[str, object],
+    embedding_model: str,
+    embedding_client: object,
+    top_k: int,
+    min_similarity: float,
+    query_vectors: object | None,
+    response_times_ns: array,
+) -> Callable[[int, GoldQuestion], dict[str, object]]:
+    """Build the per-question retrieval call; it records its latency in ``response_times_ns[position]``."""
+
+    def run_case(position: int, case: GoldQuestion) -> dict[str, object]:
+        started_at = time.perf_counter_ns()
+        if query_vectors is None:
+            retrieval_result = retrieve_chunks(
+                query=case.question,
+                index=index,
+                metadata=metadata,
+                embedding_model=embedding_model,
+                embedding_client=embedding_client,
+                top_k=top_k,
+                min_similarity=min_similarity,
+            )
+        else:
+            retrieval_result = search_chunks(
+                query=case.question,
+                query_vector=query_vectors[position : position + 1],
+                index=index,
+                metadata=metadata,
+                top_k=top_k,
+                min_similarity=min_similarity,
+            )
+        response_times_ns[position] = time.perf_counter_ns() - started_at
+        return retrieval_result
+
+    return run_case
+
+
+def _summarize(
+    gold_questions: list[GoldQuestion],
+    outcomes: Sequence[dict[str, object]],
+    response_times_ns: Sequence[int],
+    concurrency: int,
+) -> EvaluationMetrics:
     topk_hits = 0
     top1_hits = 0
     refusal_count = 0
-    response_times_ms: list[float] = []
-
-    for case in gold_questions:
-        started_at = time.perf_counter()
-        retrieval_result = retrieve_chunks(
-            query=case.question,
-            index=index,
-            metadata=metadata,
-            embedding_model=embedding_model,
-            embedding_client=embedding_client,
-            top_k=top_k,
-            min_similarity=min_similarity,
-        )
-        elapsed_ms = (time.perf_counter() - started_at) * 1000
-        response_times_ms.append(elapsed_ms)
+    # Chunks recur across questions, so each chunk's lowercased haystack is built once per run.
+    haystacks: dict[str, str] = {}
 
+    for case, retrieval_result in zip(gold_questions, outcomes):
         refused = bool(retrieval_result["rejected"])
         if refused:
             refusal_count += 1
             continue
 
         retrieved = retrieval_result.get("retrieved", [])
-        matched = [item for item in retrieved if _chunk_matches(case, item)]
-        if matched:
+        matches = [_chunk_matches(case, _chunk_haystack(item, haystacks)) for item in retrieved]
+        if any(matches):
             topk_hits += 1
-
-        if retrieved and _chunk_matches(case, retrieved[0]):
+        if matches and matches[0]:
             top1_hits += 1
 
-    sorted_times = sorted(response_times_ms)
-    p95_index = max(int(0.95 * len(sorted_times)) - 1, 0)
+    avg_time_ms, p95_time_ms = _latency_summary(response_times_ns)
 
     total = len(gold_questions)
     return EvaluationMetrics(
@@ -103,42 +283,56 @@ def evaluate_retrieval(
         retrieval_accuracy_topk=topk_hits / total,
         retrieval_accuracy_top1=top1_hits / total,
         refusal_rate=refusal_count / total,
-        avg_response_time_ms=mean(response_times_ms),
-        p95_response_time_ms=sorted_times[p95_index],
+        avg_response_time_ms=avg_time_ms,
+        p95_response_time_ms=p95_time_ms,
+        concurrency=concurrency,
     )
 
 
-def _chunk_matches(case: GoldQuestion, retrieved_item: dict[str, object]) -> bool:
-    text = str(retrieved_item.get("text", "")).lower()
-    metadata = retrieved_item.get("metadata", {})
-    if not isinstance(metadata, dict):
-        metadata = {}
+def _latency_summary(times_ns: Sequence[int]) -> tuple[float, float]:
+    """Return (mean, linearly interpolated p95) in milliseconds from integer nanosecond timings."""
+    try:
+        import numpy as np
+    except ImportError:  # pragma: no cover - optional runtime dependency for pure unit tests.
+        np = None
+
+    if np is not None:
+        times_ms = np.asarray(times_ns, dtype=np.int64) / 1e6
+        return float(times_ms.mean()), float(np.percentile(times_ms, 95))
+
+    times_ms = [elapsed / 1e6 for elapsed in times_ns]
+    if len(times_ms) == 1:
+        return times_ms[0], times_ms[0]
+    return mean(times_ms), quantiles(times_ms, n=20, method="inclusive")[-1]
+
 
-    section = str(metadata.get("section", "")).lower()
-    source = str(metadata.get("source", "")).lower()
+def _chunk_haystack(retrieved_item: dict[str, object], cache: dict[str, str]) -> str:
+    chunk_id = retrieved_item.get("id")
+    # Items without an id cannot be told apart, so they are never cached.
+    cache_key = str(chunk_id) if chunk_id not in (None, "") else None
+    haystack = cache.get(cache_key) if cache_key is not None else None
+    if haystack is None:
+        metadata = retrieved_item["metadata"]
+        text = str(retrieved_item.get("text", ""))
+        section = str(metadata.get("section", ""))
+        source = str(metadata.get("source", ""))
+        haystack = f"{text} {section} {source}".lower()
+        if cache_key is not None:
+            cache[cache_key] = haystack
+    return haystack
 
-    haystack = " ".join([text, section, source])
 
+def _chunk_matches(case: GoldQuestion, haystack: str) -> bool:
     section_hit = _section_matches(case.expected_section, haystack)
-    keyword_hit = any(keyword in haystack for keyword in case.expected_keywords)
+    keyword_hit = case.keyword_pattern.search(haystack) is not None
     return section_hit and keyword_hit
 
 
 def _section_matches(expected_section: str, haystack: str) -> bool:
-    section_aliases = {
-        "definition": ["تعريف", "cmpa", "lactose"],
-        "ingredients": ["casein", "whey", "مكونات", "ملصق"],
-        "alternatives": ["بدائل", "حليب", "تركيبة", "soy", "oat"],
-        "diagnosis": ["تشخيص", "ige", "اختبارات", "التاريخ"],
-        "management": ["إدارة", "تجنب", "نمو", "متابعة"],
-        "red_flags": ["علامات حمراء", "تأق", "إسعاف", "anaphylaxis"],
-        "symptom_checker": ["rule", "تصنيف", "خفيف", "متوسط", "شديد"],
-        "food_diary": ["يومية", "food diary", "التاريخ", "الوجبة"],
-        "recipes": ["الوصفة", "مكونات", "التحضير", "ملاءمة العمر"],
-        "medical_recommendations": ["wao", "aaaai", "تحدي غذائي", "إحالة"],
-    }
-    aliases = section_aliases.get(expected_section, [expected_section])
-    return any(alias.lower() in haystack for alias in aliases)
+    pattern = _SECTION_PATTERNS.get(expected_section)
+    if pattern is None:
+        return expected_section in haystack
+    return pattern.search(haystack) is not None
 
 
 def write_metrics_csv(metrics: EvaluationMetrics, output_csv_path: str | Path) -> None:
@@ -154,3 +348,4 @@ def write_metrics_csv(metrics: EvaluationMetrics, output_csv_path: str | Path) -
         writer.writerow(["refusal_rate", f"{metrics.refusal_rate:.4f}"])
         writer.writerow(["avg_response_time_ms", f"{metrics.avg_response_time_ms:.2f}"])
         writer.writerow(["p95_response_time_ms", f"{metrics.p95_response_time_ms:.2f}"])
+        writer.writerow(["concurrency", metrics.concurrency])
@@ -4,18 +4,24 @@ import asyncio
 import logging
 import os
 from dataclasses import dataclass
-
-from dotenv import load_dotenv
-from telegram import Update
-from telegram.constants import ParseMode
-from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters
+from typing import TYPE_CHECKING
 
 from app.services.cmpa_rag_service import CmpaRagService
 
+if TYPE_CHECKING:
+    from telegram import Update
+    from telegram.ext import Application, ContextTypes
+
+# python-telegram-bot and python-dotenv are imported where they are used so that importing this
+# module (config helpers, tests, scripts) does not pay for the full telegram.ext import graph.
+
 
 logger = logging.getLogger(__name__)
 
 
+DEFAULT_INDEX_PATH = "eval/faiss/guidelines.index"
+DEFAULT_METADATA_PATH = "eval/faiss/guidelines_metadata.json"
+
 BOT_TIMEOUT_MESSAGE = (
     "I'm taking too long to process your request. "
     "Please try again with a shorter or clearer CMPA-related question."
@@ -30,8 +36,8 @@ GENERIC_ERROR_MESSAGE = (
 @dataclass(frozen=True)
 class TelegramBotConfig:
     token: str
-    index_path: str = "eval/faiss/guidelines.index"
-    metadata_path: str = "eval/faiss/guidelines_metadata.json"
+    index_path: str = DEFAULT_INDEX_PATH
+    metadata_path: str = DEFAULT_METADATA_PATH
     request_timeout_seconds: float = 10.0
     emergency_timeout_override_seconds: float | None = None
     log_level: str = "INFO"
@@ -84,15 +90,23 @@ class TelegramCmpaBot:
             await message.reply_text(GENERIC_ERROR_MESSAGE)
             return
 
+        from telegram.constants import ParseMode
+
         await message.reply_text(answer.text, parse_mode=ParseMode.MARKDOWN)
 
+    async def _on_shutdown(self, application: Application) -> None:  # noqa: ARG002
+        self._service.close()
+
     def build_application(self) -> Application:
-        app = Application.builder().token(self._config.token).build()
+        from telegram.ext import Application, CommandHandler, MessageHandler, filters
+
+        app = Application.builder().token(self._config.token).post_shutdown(self._on_shutdown).build()
         app.add_handler(CommandHandler("start", self.on_start))
         app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.on_message))
         return app
 
     def run(self) -> None:
+        _install_uvloop()
         application = self.build_application()
         if self._config.webhook_url:
             logger.info("Starting bot in webhook mode at %s", self._config.webhook_url)
@@ -109,6 +123,17 @@ class TelegramCmpaBot:
         application.run_polling(close_loop=False)
 
 
+def _install_uvloop() -> None:
+    """Run the bot on uvloop when it is installed; PTB picks up the current event loop."""
+    try:
+        import uvloop
+    except ImportError:
+        logger.debug("uvloop not installed; using the default asyncio event loop.")
+        return
+    asyncio.set_event_loop(uvloop.new_event_loop())
+    logger.info("Using uvloop event loop.")
+
+
 def _parse_float(name: str, default: float, minimum: float, maximum: float) -> float:
     raw_value = os.getenv(name, str(default)).strip()
     try:
@@ -140,6 +165,8 @@ def _parse_log_level() -> str:
 
 
 def load_bot_config_from_env() -> TelegramBotConfig:
+    from dotenv import load_dotenv
+
     load_dotenv()
 
     token = os.getenv("TELEGRAM_BOT_TOKEN", "").strip()
@@ -161,8 +188,8 @@ def load_bot_config_from_env() -> TelegramBotConfig:
 
     return TelegramBotConfig(
         token=token,
-        index_path=os.getenv("CMPA_INDEX_PATH", "eval/faiss/guidelines.index"),
-        metadata_path=os.getenv("CMPA_METADATA_PATH", "eval/faiss/guidelines_metadata.json"),
+        index_path=os.getenv("CMPA_INDEX_PATH", DEFAULT_INDEX_PATH),
+        metadata_path=os.getenv("CMPA_METADATA_PATH", DEFAULT_METADATA_PATH),
         request_timeout_seconds=timeout,
         emergency_timeout_override_seconds=emergency_timeout,
         log_level=_parse_log_level(),
@@ -6,7 +6,7 @@ from dataclasses import dataclass
 from typing import Any
 
 from app.data.emergency_detection import maybe_get_emergency_response
-from app.data.ingestion.pipeline import load_faiss_index
+from app.data.ingestion.pipeline import build_default_embedding_client, load_faiss_index
 from app.data.retrieval import retrieve_chunks
 
 
@@ -54,6 +54,7 @@ class CmpaRagService:
         self._embedding_model = embedding_model
         self._embedding_client = embedding_client
         self._config = config or CmpaRagServiceConfig()
+        self._owns_embedding_client = False
 
     @classmethod
     def from_index_files(
@@ -65,39 +66,73 @@ class CmpaRagService:
     ) -> "CmpaRagService":
         index, metadata = load_faiss_index(index_path=index_path, metadata_path=metadata_path)
         embedding_model = str(metadata.get("embedding_model", "text-embedding-3-small"))
-        return cls(
+        owns_embedding_client = embedding_client is None
+        if owns_embedding_client:
+            # One long-lived client keeps its HTTP connection pool warm across questions.
+            embedding_client, embedding_model = build_default_embedding_client(embedding_model)
+        service = cls(
             index=index,
             metadata=metadata,
             embedding_model=embedding_model,
             embedding_client=embedding_client,
         )
+        service._owns_embedding_client = owns_embedding_client
+        return service
+
+    def close(self) -> None:
+        """Release the embedding client if this service created it."""
+        close_client = getattr(self._embedding_client, "close", None)
+        if self._owns_embedding_client and callable(close_client):
+            close_client()
 
     async def answer(self, query: str) -> CmpaAnswer:
-        return await asyncio.to_thread(self._answer_sync, query)
+        # Emergency matching and formatting are cheap pure Python and stay on the event loop;
+        # only the blocking embedding request and FAISS search go to a worker thread.
+        emergency_answer = self._emergency_answer(query)
+        if emergency_answer is not None:
+            return emergency_answer
+
+        try:
+            retrieval_result = await asyncio.to_thread(self._retrieve, query)
+        except Exception:  # pragma: no cover - defensive runtime handling.
+            logger.exception("CMPA retrieval failed.")
+            return CmpaAnswer(text=PROCESSING_ERROR_MESSAGE, is_emergency=False, is_refusal=True)
+        return self._answer_from_retrieval(query, retrieval_result)
 
     def _answer_sync(self, query: str) -> CmpaAnswer:
-        emergency_text = maybe_get_emergency_response(query)
-        if emergency_text:
-            return CmpaAnswer(
-                text=self._format_emergency_only_response(emergency_text),
-                is_emergency=True,
-                is_refusal=False,
-            )
+        emergency_answer = self._emergency_answer(query)
+        if emergency_answer is not None:
+            return emergency_answer
 
         try:
-            retrieval_result = retrieve_chunks(
-                query=query,
-                index=self._index,
-                metadata=self._metadata,
-                embedding_model=self._embedding_model,
-                embedding_client=self._embedding_client,
-                top_k=self._config.top_k,
-                min_similarity=self._config.min_similarity,
-            )
+            retrieval_result = self._retrieve(query)
         except Exception:  # pragma: no cover - defensive runtime handling.
             logger.exception("CMPA retrieval failed.")
             return CmpaAnswer(text=PROCESSING_ERROR_MESSAGE, is_emergency=False, is_refusal=True)
+        return self._answer_from_retrieval(query, retrieval_result)
+
+    def _emergency_answer(self, query: str) -> CmpaAnswer | None:
+        emergency_text = maybe_get_emergency_response(query)
+        if not emergency_text:
+            return None
+        return CmpaAnswer(
+            text=self._format_emergency_only_response(emergency_text),
+            is_emergency=True,
+            is_refusal=False,
+        )
+
+    def _retrieve(self, query: str) -> dict[str, object]:
+        return retrieve_chunks(
+            query=query,
+            index=self._index,
+            metadata=self._metadata,
+            embedding_model=self._embedding_model,
+            embedding_client=self._embedding_client,
+            top_k=self._config.top_k,
+            min_similarity=self._config.min_similarity,
+        )
 
+    def _answer_from_retrieval(self, query: str, retrieval_result: dict[str, object]) -> CmpaAnswer:
         if bool(retrieval_result.get("rejected", False)):
             return CmpaAnswer(
                 text=self._format_refusal_response(),
@@ -136,10 +171,7 @@ class CmpaRagService:
     def _format_cmpa_response(self, *, query: str, retrieved: list[dict[str, object]]) -> str:
         evidence_lines: list[str] = []
         for item in retrieved[:3]:
-            metadata = item.get("metadata", {})
-            section = ""
-            if isinstance(metadata, dict):
-                section = str(metadata.get("section", "")).strip()
+            section = str(item["metadata"].get("section", "")).strip()
 
             text = str(item.get("text", "")).strip().replace("\n", " ")
             excerpt = text[:260] + "..." if len(text) > 260 else text
@@ -4,24 +4,48 @@ import argparse
 import hashlib
 import math
 import sys
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional runtime dependency for pure unit tests.
+    np = None
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from app.data.ingestion.pipeline import build_faiss_index, ingest_guidelines, load_faiss_index
+from app.data.ingestion.pipeline import (
+    INDEX_TYPES,
+    PRECISIONS,
+    RECORDS_FORMATS,
+    build_faiss_index,
+    ingest_guidelines,
+    load_faiss_index,
+)
 from app.eval.framework import evaluate_retrieval, load_gold_questions, write_metrics_csv
 
 
+@lru_cache(maxsize=None)
+def _token_bucket(token: str, dimensions: int) -> tuple[int, float]:
+    """Hash a token to its (bucket index, sign); memoized since corpus tokens repeat heavily."""
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    index = int.from_bytes(digest[:4], "big") % dimensions
+    sign = 1.0 if digest[4] % 2 == 0 else -1.0
+    return index, sign
+
+
 class _EmbeddingItem:
     def __init__(self, embedding: list[float]) -> None:
         self.embedding = embedding
 
 
 class _EmbeddingResponse:
-    def __init__(self, embeddings: list[list[float]]) -> None:
-        self.data = [_EmbeddingItem(embedding) for embedding in embeddings]
+    def __init__(self, vectors: np.ndarray | list[list[float]]) -> None:
+        rows = vectors.tolist() if hasattr(vectors, "tolist") else vectors
+        self.data = [_EmbeddingItem(embedding) for embedding in rows]
+        self.vectors = vectors
 
 
 class _DeterministicEmbeddingsAPI:
@@ -29,15 +53,33 @@ class _DeterministicEmbeddingsAPI:
         self.dimensions = dimensions
 
     def create(self, model: str, input: list[str]) -> _EmbeddingResponse:
-        vectors = [self._to_vector(text) for text in input]
-        return _EmbeddingResponse(vectors)
+        if np is None:
+            return _EmbeddingResponse([self._to_vector(text) for text in input])
+
+        tokens: list[str] = []
+        doc_ids: list[int] = []
+        for doc_id, text in enumerate(input):
+            text_tokens = text.lower().split()
+            tokens.extend(text_tokens)
+            doc_ids.extend([doc_id] * len(text_tokens))
+
+        matrix = np.zeros((len(input), self.dimensions), dtype=np.float32)
+        if tokens:
+            indices, signs = zip(*(_token_bucket(token, self.dimensions) for token in tokens))
+            np.add.at(
+                matrix,
+                (np.asarray(doc_ids, dtype=np.intp), np.asarray(indices, dtype=np.intp)),
+                np.asarray(signs, dtype=np.float32),
+            )
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return _EmbeddingResponse(matrix / norms)
 
     def _to_vector(self, text: str) -> list[float]:
         vector = [0.0] * self.dimensions
         for token in text.lower().split():
-            digest = hashlib.sha256(token.encode("utf-8")).hexdigest()
-            index = int(digest[:8], 16) % self.dimensions
-            sign = 1.0 if int(digest[8:10], 16) % 2 == 0 else -1.0
+            index, sign = _token_bucket(token, self.dimensions)
             vector[index] += sign
 
         norm = math.sqrt(sum(value * value for value in vector)) or 1.0
@@ -66,6 +108,24 @@ def build_parser() -> argparse.ArgumentParser:
         default="eval/faiss",
         help="Directory for FAISS index and metadata files.",
     )
+    parser.add_argument(
+        "--index-type",
+        choices=INDEX_TYPES,
+        default=None,
+        help="FAISS index type to build; defaults to choosing by corpus size (flat below 10k chunks).",
+    )
+    parser.add_argument(
+        "--precision",
+        choices=PRECISIONS,
+        default="fp32",
+        help="Vector precision; binary packs sign bits and rescores candidates with the fp32 vectors.",
+    )
+    parser.add_argument(
+        "--records-format",
+        choices=RECORDS_FORMATS,
+        default="json",
+        help="Where chunk records are stored: inline in the metadata JSON, or a Parquet file (needs pyarrow).",
+    )
     parser.add_argument(
         "--top-k",
         type=int,
@@ -90,7 +150,13 @@ def _cmpa_sources() -> list[Path]:
     ]
 
 
-def _build_index(index_dir: Path, embedding_client: DeterministicEmbeddingClient) -> tuple[object, dict[str, object]]:
+def _build_index(
+    index_dir: Path,
+    embedding_client: DeterministicEmbeddingClient,
+    index_type: str | None = None,
+    precision: str = "fp32",
+    records_format: str = "json",
+) -> tuple[object, dict[str, object]]:
     records = []
     for source in _cmpa_sources():
         records.extend(ingest_guidelines(source))
@@ -100,6 +166,9 @@ def _build_index(index_dir: Path, embedding_client: DeterministicEmbeddingClient
         output_dir=index_dir,
         embedding_model="deterministic-local",
         embedding_client=embedding_client,
+        index_type=index_type,
+        precision=precision,
+        records_format=records_format,
     )
     return load_faiss_index(index_path, metadata_path)
 
@@ -109,7 +178,13 @@ def main() -> None:
     args = parser.parse_args()
 
     embedding_client = DeterministicEmbeddingClient()
-    index, metadata = _build_index(Path(args.index_dir), embedding_client)
+    index, metadata = _build_index(
+        Path(args.index_dir),
+        embedding_client,
+        index_type=args.index_type,
+        precision=args.precision,
+        records_format=args.records_format,
+    )
     gold_questions = load_gold_questions(args.gold)
 
     metrics = evaluate_retrieval(
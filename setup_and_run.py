@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import hashlib
+import importlib
 import os
 import re
+import socket
 import subprocess
 import sys
+import threading
 import urllib.error
 import urllib.parse
 import urllib.request
@@ -13,7 +17,10 @@ from pathlib import Path
 MIN_PYTHON = (3, 9)
 DEFAULT_INDEX = "eval/faiss/guidelines.index"
 DEFAULT_METADATA = "eval/faiss/guidelines_metadata.json"
-TOKEN_PATTERN = re.compile(r"^\d{8,}:[A-Za-z0-9_-]{20,}$")
+TOKEN_PATTERN = re.compile(r"\d{8,}:[A-Za-z0-9_-]{20,}")
+TELEGRAM_API_HOST = "api.telegram.org"
+PREFLIGHT_TIMEOUT_SECONDS = 2
+CACHE_DIR = Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache") / "medical-rag"
 
 
 def print_step(message: str) -> None:
@@ -28,12 +35,47 @@ def ensure_python_version() -> None:
         )
 
 
+def _requirements_digest(requirements_path: Path) -> str:
+    # Key on the interpreter too, so a new virtualenv never reuses another one's marker.
+    digest = hashlib.sha256(sys.executable.encode("utf-8") + b"\0")
+    digest.update(requirements_path.read_bytes())
+    return digest.hexdigest()
+
+
+def _dependencies_consistent() -> bool:
+    result = subprocess.run([sys.executable, "-m", "pip", "check"], capture_output=True)
+    return result.returncode == 0
+
+
 def install_requirements(project_root: Path) -> None:
+    requirements_path = project_root / "requirements.txt"
+    marker_path = CACHE_DIR / "installed.sha256"
+    digest = _requirements_digest(requirements_path)
+
+    if (
+        marker_path.exists()
+        and marker_path.read_text(encoding="utf-8").strip() == digest
+        and _dependencies_consistent()
+    ):
+        print_step("Dependencies up to date")
+        return
+
     print_step("Installing dependencies from requirements.txt")
     subprocess.run(
-        [sys.executable, "-m", "pip", "install", "-r", str(project_root / "requirements.txt")],
+        [
+            sys.executable,
+            "-m",
+            "pip",
+            "install",
+            "--cache-dir",
+            str(CACHE_DIR / "pip"),
+            "-r",
+            str(requirements_path),
+        ],
         check=True,
     )
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    marker_path.write_text(digest, encoding="utf-8")
 
 
 def load_env_file(path: Path) -> dict[str, str]:
@@ -41,30 +83,32 @@ def load_env_file(path: Path) -> dict[str, str]:
     if not path.exists():
         return data
 
-    for line in path.read_text(encoding="utf-8").splitlines():
-        stripped = line.strip()
-        if not stripped or stripped.startswith("#") or "=" not in stripped:
-            continue
-        key, value = stripped.split("=", 1)
-        data[key.strip()] = value.strip()
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            stripped = line.strip()
+            if not stripped or stripped.startswith("#") or "=" not in stripped:
+                continue
+            key, value = stripped.split("=", 1)
+            data[key.strip()] = value.strip()
     return data
 
 
 def save_env_file(path: Path, values: dict[str, str]) -> None:
-    lines: list[str] = []
-    for raw_line in path.read_text(encoding="utf-8").splitlines():
+    remaining = dict(values)
+    lines = path.read_text(encoding="utf-8").splitlines() if path.exists() else []
+    for position, raw_line in enumerate(lines):
         stripped = raw_line.strip()
         if not stripped or stripped.startswith("#") or "=" not in raw_line:
-            lines.append(raw_line)
             continue
 
         key, _ = raw_line.split("=", 1)
         normalized_key = key.strip()
         if normalized_key in values:
-            lines.append(f"{normalized_key}={values[normalized_key]}")
-        else:
-            lines.append(raw_line)
+            lines[position] = f"{normalized_key}={values[normalized_key]}"
+            remaining.pop(normalized_key, None)
 
+    # Keys absent from the file (e.g. an older .env) are appended rather than dropped.
+    lines.extend(f"{key}={value}" for key, value in remaining.items())
     path.write_text("\n".join(lines) + "\n", encoding="utf-8")
 
 
@@ -74,11 +118,57 @@ def prompt_with_default(prompt: str, default: str) -> str:
 
 
 def validate_token_format(token: str) -> bool:
-    return bool(TOKEN_PATTERN.match(token))
+    return TOKEN_PATTERN.fullmatch(token) is not None
+
+
+def _resolve_with_timeout(host: str, port: int, timeout: float) -> list[tuple]:
+    """getaddrinfo takes no timeout, so resolve on a daemon thread and stop waiting after ``timeout``."""
+    outcome: list[object] = []
+
+    def resolve() -> None:
+        try:
+            outcome.append(socket.getaddrinfo(host, port, type=socket.SOCK_STREAM))
+        except OSError as exc:
+            outcome.append(exc)
+
+    # A daemon thread left blocked in a broken resolver does not keep the process alive.
+    worker = threading.Thread(target=resolve, name="telegram-dns-preflight", daemon=True)
+    worker.start()
+    worker.join(timeout)
+    if not outcome:
+        raise TimeoutError(f"DNS lookup timed out after {timeout} seconds")
+    if isinstance(outcome[0], OSError):
+        raise outcome[0]
+    return outcome[0]
+
+
+def _telegram_unreachable_reason() -> str | None:
+    """Cheap TCP reachability check so offline setups fail fast instead of waiting on TLS."""
+    if urllib.request.getproxies().get("https"):
+        # Direct connections may be blocked where the proxy works; let urllib decide.
+        return None
+
+    try:
+        addresses = _resolve_with_timeout(TELEGRAM_API_HOST, 443, PREFLIGHT_TIMEOUT_SECONDS)
+    except OSError as exc:
+        return f"Network error while resolving {TELEGRAM_API_HOST}: {exc}"
+
+    last_error: OSError | None = None
+    for *_, sockaddr in addresses:
+        try:
+            with socket.create_connection(sockaddr[:2], timeout=PREFLIGHT_TIMEOUT_SECONDS):
+                return None
+        except OSError as exc:
+            last_error = exc
+    return f"Network error while reaching Telegram API: {last_error}"
 
 
 def test_telegram_connectivity(token: str) -> tuple[bool, str]:
-    url = f"https://api.telegram.org/bot{urllib.parse.quote(token, safe=':')}/getMe"
+    unreachable_reason = _telegram_unreachable_reason()
+    if unreachable_reason is not None:
+        return False, unreachable_reason
+
+    url = f"https://{TELEGRAM_API_HOST}/bot{urllib.parse.quote(token, safe=':')}/getMe"
     try:
         with urllib.request.urlopen(url, timeout=10) as response:
             payload = response.read().decode("utf-8", errors="replace")
@@ -157,6 +247,18 @@ def run_wizard(project_root: Path, env_path: Path) -> None:
 
 def launch_bot(project_root: Path) -> None:
     print_step("Launching Telegram bot")
+    # Windows signal handling differs for a bot started from this script, so keep it in a child process there.
+    if sys.platform != "win32":
+        # Packages installed earlier in this run are only importable once the finder caches are refreshed.
+        importlib.invalidate_caches()
+        try:
+            from app.interfaces.telegram_bot import run as run_bot
+        except ImportError:
+            pass
+        else:
+            run_bot()
+            return
+
     subprocess.run([sys.executable, "-m", "app.interfaces.telegram_bot"], cwd=project_root, check=True)
 
 
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import heapq
+from collections.abc import Callable
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional runtime dependency for pure unit tests.
+    np = None
+
+try:
+    import faiss
+except ImportError:  # pragma: no cover - optional runtime dependency for pure unit tests.
+    faiss = None
+
+
+class FakeIndex:
+    """Exact inner-product index shared by the retrieval tests.
+
+    Delegates to ``faiss.IndexFlatIP`` when FAISS is installed so the tests run the production search
+    kernel, and otherwise falls back to NumPy or plain Python.
+    """
+
+    def __init__(self, vectors: list[list[float]]) -> None:
+        # A float32 (N, d) matrix when NumPy is available, so search is a single matrix-vector product.
+        self.vectors = np.asarray(vectors, dtype=np.float32) if np is not None else vectors
+        self._index = None
+        if faiss is not None:
+            self._index = faiss.IndexFlatIP(self.vectors.shape[1])
+            self._index.add(self.vectors)
+
+    def search(self, query_vector, top_k: int):
+        if self._index is not None:
+            queries = np.ascontiguousarray(query_vector, dtype=np.float32).reshape(-1, self.vectors.shape[1])
+            return self._index.search(queries, min(top_k, self._index.ntotal))
+        if np is None:
+            return self._search_python(query_vector[0], top_k)
+
+        scores = self.vectors @ np.asarray(query_vector[0], dtype=np.float32)
+        k = min(top_k, scores.shape[0])
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        # Order by score, then by position, matching a stable sort over the whole corpus.
+        selected = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return [scores[selected].tolist()], [selected.tolist()]
+
+    def _search_python(self, query: list[float], top_k: int):
+        ranked = ((idx, sum(a * b for a, b in zip(query, row))) for idx, row in enumerate(self.vectors))
+        selected = heapq.nlargest(top_k, ranked, key=lambda item: item[1])
+        return [[score for _, score in selected]], [[idx for idx, _ in selected]]
+
+
+class FakeEmbeddingItem:
+    def __init__(self, embedding) -> None:
+        self.embedding = embedding
+
+
+class FakeEmbeddingResponse:
+    def __init__(self, data: list[FakeEmbeddingItem]) -> None:
+        self.data = data
+
+
+class FakeEmbeddingsAPI:
+    """Embeds every input with ``vector``, or with ``vector(text)`` when it is callable."""
+
+    def __init__(self, vector: list[float] | Callable[[str], list[float]]) -> None:
+        self._vector = vector
+        # A fixed vector gets one shared item, built up front rather than on every call.
+        self._item = None if callable(vector) else FakeEmbeddingItem(vector)
+        self.calls = 0
+
+    def create(self, model: str, input: list[str]) -> FakeEmbeddingResponse:
+        self.calls += 1
+        if self._item is not None:
+            return FakeEmbeddingResponse([self._item] * len(input))
+        return FakeEmbeddingResponse([FakeEmbeddingItem(self._vector(text)) for text in input])
+
+
+class FakeClient:
+    def __init__(self, vector: list[float] | Callable[[str], list[float]]) -> None:
+        self.embeddings = FakeEmbeddingsAPI(vector)
@@ -1,6 +1,24 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+from tests._fakes import FakeIndex  # noqa: E402 - needs ROOT on sys.path
+
+
+@pytest.fixture(scope="session")
+def threshold_corpus() -> tuple[FakeIndex, dict[str, object]]:
+    """One strongly matching chunk and two weak ones, shared by the threshold tests."""
+    index = FakeIndex(vectors=[[1.0, 0.0], [0.3, 0.0], [0.1, 0.0]])
+    metadata = {
+        "records": [
+            {"id": "known-guideline", "text": "Known clinical guidance", "metadata": {}},
+            {"id": "other-1", "text": "Other chunk", "metadata": {}},
+            {"id": "other-2", "text": "Other chunk 2", "metadata": {}},
+        ]
+    }
+    return index, metadata
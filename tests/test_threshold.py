@@ -1,61 +1,37 @@
 from __future__ import annotations
 
-from app.data.retrieval import retrieve_chunks
-
-
-class _FakeEmbeddingItem:
-    def __init__(self, embedding: list[float]) -> None:
-        self.embedding = embedding
-
-
-class _FakeEmbeddingResponse:
-    def __init__(self, data: list[_FakeEmbeddingItem]) -> None:
-        self.data = data
-
-
-class _FakeEmbeddingsAPI:
-    def create(self, model: str, input: list[str]) -> _FakeEmbeddingResponse:
-        return _FakeEmbeddingResponse([_FakeEmbeddingItem([0.1, 0.0])])
-
+import pytest
 
-class _FakeClient:
-    def __init__(self) -> None:
-        self.embeddings = _FakeEmbeddingsAPI()
-
-
-class _FakeIndex:
-    def __init__(self, vectors: list[list[float]]) -> None:
-        self.vectors = vectors
-
-    def search(self, query_vector, top_k: int):
-        query = query_vector[0]
-        ranked = []
-        for idx, row in enumerate(self.vectors):
-            score = sum(a * b for a, b in zip(query, row))
-            ranked.append((idx, score))
-
-        ranked.sort(key=lambda item: item[1], reverse=True)
-        selected = ranked[:top_k]
-        return [[score for _, score in selected]], [[idx for idx, _ in selected]]
-
-
-def test_unknown_query_is_rejected_below_threshold() -> None:
-    index = _FakeIndex(vectors=[[0.6, 0.0], [0.5, 0.0]])
-    metadata = {
-        "records": [
-            {"id": "chunk-1", "text": "Known content", "metadata": {}},
-            {"id": "chunk-2", "text": "Known content 2", "metadata": {}},
-        ]
-    }
+from app.data.retrieval import retrieve_chunks
+from tests._fakes import FakeClient
+
+
+# Query vectors are unit length, so scores are the same whether or not retrieval normalizes them.
+@pytest.mark.parametrize(
+    ("query", "query_vector", "expect_rejected", "expected_max_similarity"),
+    [
+        ("known question", [1.0, 0.0], False, 1.0),
+        ("near-miss question", [0.6, 0.8], True, 0.6),
+        ("unknown question", [0.0, 1.0], True, 0.0),
+    ],
+    ids=["known", "near_miss", "unknown"],
+)
+def test_similarity_threshold_gates_retrieval(
+    threshold_corpus, query, query_vector, expect_rejected, expected_max_similarity
+) -> None:
+    index, metadata = threshold_corpus
 
     result = retrieve_chunks(
-        query="unknown question",
+        query=query,
         index=index,
         metadata=metadata,
-        embedding_client=_FakeClient(),
+        embedding_client=FakeClient(query_vector),
         min_similarity=0.75,
     )
 
-    assert result["rejected"] is True
-    assert result["retrieved"] == []
-    assert result["max_similarity"] < 0.75
+    assert result["rejected"] is expect_rejected
+    assert result["max_similarity"] == pytest.approx(expected_max_similarity, rel=1e-6, abs=1e-6)
+    if expect_rejected:
+        assert result["retrieved"] == []
+    else:
+        assert result["retrieved"][0]["id"] == "known-guideline"
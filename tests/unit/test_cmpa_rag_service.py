@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+
 from app.services.cmpa_rag_service import CmpaRagService
 
 
@@ -63,3 +65,100 @@ def test_structured_cmpa_response_contains_sections(monkeypatch) -> None:
     assert "*CMPA Guidance*" in answer.text
     assert "*Evidence from CMPA knowledge base*" in answer.text
     assert "• [diagnosis]" in answer.text
+
+
+def test_repeated_questions_reuse_cached_query_embedding(monkeypatch) -> None:
+    class _CountingEmbeddingsAPI:
+        def __init__(self) -> None:
+            self.calls = 0
+
+        def create(self, model: str, input: list[str]):
+            self.calls += 1
+            return type("Response", (), {"data": [type("Item", (), {"embedding": [1.0, 0.0]})() for _ in input]})()
+
+    class _Client:
+        def __init__(self) -> None:
+            self.embeddings = _CountingEmbeddingsAPI()
+
+    class _Index:
+        def search(self, query_vector, top_k: int):
+            return [[0.9]], [[0]]
+
+    client = _Client()
+    service = CmpaRagService(
+        index=_Index(),
+        metadata={"records": [{"id": "1", "text": "CMPA guidance", "metadata": {"section": "diagnosis"}}]},
+        embedding_client=client,
+    )
+    monkeypatch.setattr("app.services.cmpa_rag_service.maybe_get_emergency_response", lambda query: None)
+
+    first = service._answer_sync("What is CMPA?")
+    second = service._answer_sync("What is  CMPA? ")
+
+    assert client.embeddings.calls == 1
+    assert first.is_refusal is False
+    assert second.is_refusal is False
+
+
+def test_async_answer_offloads_only_retrieval(monkeypatch) -> None:
+    service = _build_service()
+    offloaded: list[str] = []
+
+    async def fake_to_thread(func, *args, **kwargs):
+        offloaded.append(func.__name__)
+        return func(*args, **kwargs)
+
+    monkeypatch.setattr("app.services.cmpa_rag_service.asyncio.to_thread", fake_to_thread)
+    monkeypatch.setattr("app.services.cmpa_rag_service.maybe_get_emergency_response", lambda query: None)
+    monkeypatch.setattr(
+        "app.services.cmpa_rag_service.retrieve_chunks",
+        lambda **kwargs: {
+            "rejected": False,
+            "retrieved": [{"text": "CMPA guidance", "metadata": {"section": "diagnosis"}}],
+        },
+    )
+
+    answer = asyncio.run(service.answer("What is CMPA?"))
+
+    assert offloaded == ["_retrieve"]
+    assert "*CMPA Guidance*" in answer.text
+
+
+def test_from_index_files_builds_one_pooled_client_and_closes_it(monkeypatch) -> None:
+    class _ClosableClient:
+        closed = False
+
+        def close(self) -> None:
+            self.closed = True
+
+    built: list[_ClosableClient] = []
+
+    def fake_build_client(model: str):
+        built.append(_ClosableClient())
+        return built[-1], model
+
+    monkeypatch.setattr(
+        "app.services.cmpa_rag_service.load_faiss_index",
+        lambda **kwargs: (_DummyIndex(), {"embedding_model": "text-embedding-3-small", "records": []}),
+    )
+    monkeypatch.setattr("app.services.cmpa_rag_service.build_default_embedding_client", fake_build_client)
+
+    service = CmpaRagService.from_index_files(index_path="unused.index", metadata_path="unused.json")
+    service.close()
+
+    assert len(built) == 1
+    assert built[0].closed is True
+
+
+def test_async_emergency_answer_skips_worker_thread(monkeypatch) -> None:
+    service = _build_service()
+
+    async def fail_to_thread(func, *args, **kwargs):
+        raise AssertionError("emergency answers must not leave the event loop")
+
+    monkeypatch.setattr("app.services.cmpa_rag_service.asyncio.to_thread", fail_to_thread)
+
+    answer = asyncio.run(service.answer("My baby has trouble breathing after milk"))
+
+    assert answer.is_emergency is True
+    assert "EMERGENCY WARNING" in answer.text
@@ -2,66 +2,105 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
+from types import SimpleNamespace
 
 import math
 
-from app.data.ingestion.models import IngestionConfig
-from app.data.ingestion.pipeline import build_faiss_index, load_faiss_index, rebuild_index
+import pytest
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional runtime dependency for pure unit tests.
+    np = None
 
-class _FakeEmbeddingItem:
-    def __init__(self, embedding: list[float]) -> None:
-        self.embedding = embedding
+from app.data.ingestion.models import IngestionConfig
+from app.data.ingestion.pipeline import (
+    HNSW_MIN_VECTORS,
+    IVF_MIN_VECTORS,
+    IVF_NPROBE,
+    PQ_MIN_TRAINING_VECTORS,
+    _read_index,
+    _select_index_type,
+    build_faiss_index,
+    load_faiss_index,
+    rebuild_index,
+)
+from tests._fakes import FakeEmbeddingItem, FakeEmbeddingResponse
 
 
-class _FakeEmbeddingResponse:
-    def __init__(self, data: list[_FakeEmbeddingItem]) -> None:
-        self.data = data
+def _as_embedding(values: list[float]):
+    """Embedding clients hand back float32 arrays when NumPy is available."""
+    return np.asarray(values, dtype=np.float32) if np is not None else values
 
 
 class _FakeEmbeddingsAPI:
-    def create(self, model: str, input: list[str]) -> _FakeEmbeddingResponse:
+    def __init__(self, max_batch_size: int | None = None) -> None:
+        self.max_batch_size = max_batch_size
+        self.batch_sizes: list[int] = []
+
+    def create(self, model: str, input: list[str]) -> FakeEmbeddingResponse:
+        assert self.max_batch_size is None or len(input) <= self.max_batch_size
+        self.batch_sizes.append(len(input))
         vectors = [[float(i + 1), float(len(text) + 1)] for i, text in enumerate(input)]
-        return _FakeEmbeddingResponse([_FakeEmbeddingItem(v) for v in vectors])
+        return FakeEmbeddingResponse([FakeEmbeddingItem(_as_embedding(v)) for v in vectors])
 
 
 class _FakeClient:
-    def __init__(self) -> None:
-        self.embeddings = _FakeEmbeddingsAPI()
+    def __init__(self, max_batch_size: int | None = None) -> None:
+        self.embeddings = _FakeEmbeddingsAPI(max_batch_size)
 
 
 class _FakeIndexFlatIP:
     def __init__(self, dim: int) -> None:
         self.dim = dim
-        self.vectors: list[list[float]] | None = None
+        self.vectors = None
 
     def add(self, vectors) -> None:
-        rows = vectors.tolist() if hasattr(vectors, "tolist") else vectors
-        self.vectors = [list(row) for row in rows]
+        self.vectors = vectors
+
+
+class _FakeIVFPQ(_FakeIndexFlatIP):
+    def __init__(self, dim: int, spec: str) -> None:
+        super().__init__(dim)
+        self.spec = spec
+        self.trained = False
+        self.nprobe = 1
+
+    def train(self, vectors) -> None:
+        self.trained = True
 
 
 class _FakeFaiss:
+    METRIC_INNER_PRODUCT = 0
+
     def __init__(self) -> None:
         self.index: _FakeIndexFlatIP | None = None
 
     @staticmethod
     def normalize_L2(vectors) -> None:
-        as_list = vectors.tolist() if hasattr(vectors, "tolist") else vectors
-        normalized: list[list[float]] = []
-        for row in as_list:
-            norm = math.sqrt(sum(v * v for v in row)) or 1.0
-            normalized.append([v / norm for v in row])
-
-        if hasattr(vectors, "tolist"):
-            for i, row in enumerate(normalized):
-                vectors[i] = row
-        else:
-            vectors[:] = normalized
+        if np is None:
+            for i, row in enumerate(vectors):
+                norm = math.sqrt(sum(v * v for v in row)) or 1.0
+                vectors[i] = [v / norm for v in row]
+            return
+
+        # With NumPy installed the pipeline hands over a contiguous float32 matrix, like real FAISS expects.
+        assert isinstance(vectors, np.ndarray) and vectors.dtype == np.float32
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors /= norms
 
     def IndexFlatIP(self, dim: int) -> _FakeIndexFlatIP:
         self.index = _FakeIndexFlatIP(dim)
         return self.index
 
+    def index_factory(self, dim: int, spec: str, metric: int) -> _FakeIVFPQ:
+        self.index = _FakeIVFPQ(dim, spec)
+        return self.index
+
+    def extract_index_ivf(self, index) -> _FakeIVFPQ:
+        return self.index
+
     @staticmethod
     def write_index(index: _FakeIndexFlatIP, path: str) -> None:
         Path(path).write_text(f"dim={index.dim};count={0 if index.vectors is None else len(index.vectors)}", encoding="utf-8")
@@ -95,7 +134,12 @@ def test_build_faiss_index_saves_index_and_metadata(tmp_path: Path, monkeypatch,
     metadata = json.loads(metadata_path.read_text(encoding="utf-8"))
     assert metadata["embedding_model"] == "text-embedding-3-small"
     assert metadata["dimension"] == 2
-    assert [item["id"] for item in metadata["records"]] == ["a", "b"]
+    assert metadata["index_type"] == "flat"
+    assert metadata["precision"] == "fp32"
+    # Records stay inline by default, so the artifacts load without pyarrow wherever they were built.
+    assert "records_file" not in metadata
+    _, loaded_metadata = load_faiss_index(index_path, metadata_path)
+    assert [record["id"] for record in loaded_metadata["records"]] == ["a", "b"]
 
     assert fake_faiss.index is not None
     assert fake_faiss.index.vectors is not None
@@ -106,6 +150,44 @@ def test_build_faiss_index_saves_index_and_metadata(tmp_path: Path, monkeypatch,
     assert "Embedding generation completed in" in caplog.text
 
 
+def test_build_faiss_index_supports_opt_in_ivfpq(tmp_path: Path, monkeypatch) -> None:
+    fake_faiss = _FakeFaiss()
+    monkeypatch.setattr("app.data.ingestion.pipeline._get_faiss_module", lambda: fake_faiss)
+    records = [{"id": str(i), "text": "x", "metadata": {}} for i in range(PQ_MIN_TRAINING_VECTORS)]
+
+    index_path, metadata_path = build_faiss_index(
+        records,
+        output_dir=tmp_path,
+        embedding_client=_FakeClient(),
+        index_type="ivfpq",
+    )
+    _, metadata = load_faiss_index(index_path, metadata_path)
+
+    assert metadata["index_type"] == "ivfpq"
+    assert fake_faiss.index.spec == "OPQ2,IVF64,PQ2"
+    assert fake_faiss.index.trained is True
+    assert fake_faiss.index.nprobe == IVF_NPROBE
+
+    with pytest.raises(ValueError, match="at least"):
+        build_faiss_index(records[:10], output_dir=tmp_path, embedding_client=_FakeClient(), index_type="ivfpq")
+
+
+def test_build_faiss_index_respects_embed_batch_size(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr("app.data.ingestion.pipeline._get_faiss_module", lambda: _FakeFaiss())
+    client = _FakeClient(max_batch_size=2)
+    records = [{"id": str(i), "text": "x" * (i + 1), "metadata": {}} for i in range(5)]
+
+    build_faiss_index(records, output_dir=tmp_path, embedding_client=client, embed_batch_size=2)
+
+    assert sorted(client.embeddings.batch_sizes) == [1, 2, 2]
+
+
+def test_select_index_type_scales_with_corpus_size() -> None:
+    assert _select_index_type(HNSW_MIN_VECTORS - 1) == "flat"
+    assert _select_index_type(HNSW_MIN_VECTORS) == "hnsw"
+    assert _select_index_type(IVF_MIN_VECTORS) == "ivf"
+
+
 def test_rebuild_index_ingests_and_builds(tmp_path: Path, monkeypatch) -> None:
     sample = tmp_path / "guideline_2024.txt"
     sample.write_text("INTRO\nSentence one. Sentence two.", encoding="utf-8")
@@ -123,8 +205,8 @@ def test_rebuild_index_ingests_and_builds(tmp_path: Path, monkeypatch) -> None:
     assert index_path.exists()
     assert index_path.stat().st_size > 0
     assert metadata_path.exists()
-    payload = json.loads(metadata_path.read_text(encoding="utf-8"))
-    assert payload["records"]
+    _, loaded_metadata = load_faiss_index(index_path, metadata_path)
+    assert loaded_metadata["records"]
 
 
 def test_load_faiss_index_reads_index_and_metadata(tmp_path: Path, monkeypatch) -> None:
@@ -147,6 +229,60 @@ def test_load_faiss_index_reads_index_and_metadata(tmp_path: Path, monkeypatch)
     assert loaded_index["dim"] == "2"
     assert loaded_index["count"] == "2"
     assert len(loaded_metadata["records"]) == 2
+    assert loaded_metadata["records"][1] == {"id": "b", "text": "beta", "metadata": {"section": "S2"}}
+
+
+def test_parquet_records_round_trip(tmp_path: Path, monkeypatch) -> None:
+    pytest.importorskip("pyarrow")
+    from app.data.ingestion.storage import ArrowChunkRecords
+
+    monkeypatch.setattr("app.data.ingestion.pipeline._get_faiss_module", _FakeFaiss)
+    records = [
+        {"id": "a", "text": "alpha", "metadata": {"section": "S1", "page": 3, "year": None}},
+        {"id": "b", "text": "beta", "metadata": {"section": "S2", "year": 2024}},
+        {"id": "c", "text": "gamma", "metadata": {}},
+    ]
+
+    index_path, metadata_path = build_faiss_index(
+        records, output_dir=tmp_path, embedding_client=_FakeClient(), records_format="parquet"
+    )
+
+    payload = json.loads(metadata_path.read_text(encoding="utf-8"))
+    assert "records" not in payload
+    assert (tmp_path / payload["records_file"]).exists()
+    _, loaded_metadata = load_faiss_index(index_path, metadata_path)
+    loaded_records = loaded_metadata["records"]
+    assert isinstance(loaded_records, ArrowChunkRecords)
+    # Keys a row never had are dropped again, while stored None values such as a missing year are kept.
+    assert list(loaded_records) == records
+    assert loaded_records[-1] == records[-1]
+    assert loaded_records[1:] == records[1:]
+    with pytest.raises(IndexError):
+        loaded_records[len(records)]
+
+
+def test_json_records_format_stores_records_inline(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr("app.data.ingestion.pipeline._get_faiss_module", _FakeFaiss)
+    records = [
+        {"id": "a", "text": "alpha", "metadata": {"source": "s", "year": None, "section": "S1"}},
+        {"id": "b", "text": "beta", "metadata": {"source": "s"}},
+    ]
+
+    index_path, metadata_path = build_faiss_index(
+        records, output_dir=tmp_path, embedding_client=_FakeClient(), records_format="json"
+    )
+
+    payload = json.loads(metadata_path.read_text(encoding="utf-8"))
+    assert "records_file" not in payload
+    assert not list(tmp_path.glob("*.parquet"))
+    _, loaded_metadata = load_faiss_index(index_path, metadata_path)
+    assert list(loaded_metadata["records"]) == records
+
+    with pytest.raises(ValueError, match="Unsupported records_format: 'csv'"):
+        build_faiss_index(records, output_dir=tmp_path, embedding_client=_FakeClient(), records_format="csv")
+    monkeypatch.setattr("app.data.ingestion.pipeline.pyarrow_available", lambda: False)
+    with pytest.raises(RuntimeError, match="pyarrow is required"):
+        build_faiss_index(records, output_dir=tmp_path, embedding_client=_FakeClient(), records_format="parquet")
 
 
 def test_embed_texts_uses_local_model_prefix(monkeypatch) -> None:
@@ -154,9 +290,9 @@ def test_embed_texts_uses_local_model_prefix(monkeypatch) -> None:
         def __init__(self) -> None:
             self.models: list[str] = []
 
-        def create(self, model: str, input: list[str]) -> _FakeEmbeddingResponse:
+        def create(self, model: str, input: list[str]) -> FakeEmbeddingResponse:
             self.models.append(model)
-            return _FakeEmbeddingResponse([_FakeEmbeddingItem([1.0, 0.0]) for _ in input])
+            return FakeEmbeddingResponse([FakeEmbeddingItem([1.0, 0.0]) for _ in input])
 
     class _RecordingClient:
         def __init__(self) -> None:
@@ -178,9 +314,9 @@ def test_embed_texts_falls_back_to_local_without_openai_key(monkeypatch) -> None
         def __init__(self) -> None:
             self.models: list[str] = []
 
-        def create(self, model: str, input: list[str]) -> _FakeEmbeddingResponse:
+        def create(self, model: str, input: list[str]) -> FakeEmbeddingResponse:
             self.models.append(model)
-            return _FakeEmbeddingResponse([_FakeEmbeddingItem([1.0, 0.0]) for _ in input])
+            return FakeEmbeddingResponse([FakeEmbeddingItem([1.0, 0.0]) for _ in input])
 
     class _RecordingClient:
         def __init__(self) -> None:
@@ -198,3 +334,193 @@ def test_embed_texts_falls_back_to_local_without_openai_key(monkeypatch) -> None
 
     assert len(vectors) == 1
     assert client.embeddings.models == [DEFAULT_LOCAL_EMBEDDING_MODEL]
+
+
+def test_embed_texts_keeps_input_order_across_concurrent_batches() -> None:
+    class _EchoEmbeddingsAPI:
+        def create(self, model: str, input: list[str]) -> FakeEmbeddingResponse:
+            return FakeEmbeddingResponse([FakeEmbeddingItem([float(text), 0.0]) for text in input])
+
+    class _EchoClient:
+        def __init__(self) -> None:
+            self.embeddings = _EchoEmbeddingsAPI()
+
+    from app.data.ingestion.pipeline import _embed_texts
+
+    vectors = _embed_texts([str(i) for i in range(7)], model="fake", embedding_client=_EchoClient(), batch_size=2)
+
+    assert [float(row[0]) for row in vectors] == [float(i) for i in range(7)]
+
+
+def test_load_faiss_index_memory_maps_unless_disabled(tmp_path: Path, monkeypatch) -> None:
+    read_flags: list[int | None] = []
+
+    class _MmapFakeFaiss(_FakeFaiss):
+        IO_FLAG_MMAP = 1
+        IO_FLAG_READ_ONLY = 2
+        IO_FLAG_MMAP_IFC = 512
+
+        @staticmethod
+        def read_index(path: str, io_flags: int | None = None) -> dict[str, str]:
+            read_flags.append(io_flags)
+            return _FakeFaiss.read_index(path)
+
+    monkeypatch.setattr("app.data.ingestion.pipeline._get_faiss_module", lambda: _MmapFakeFaiss())
+    index_path, metadata_path = build_faiss_index(
+        [{"id": "a", "text": "alpha", "metadata": {}}],
+        output_dir=tmp_path,
+        embedding_client=_FakeClient(),
+    )
+
+    load_faiss_index(index_path, metadata_path)
+    load_faiss_index(index_path, metadata_path, mmap=False)
+
+    assert read_flags == [512 | 2, None]
+
+
+@pytest.mark.parametrize(
+    ("index_type", "expected_flags"),
+    [("flat", 512 | 2), ("hnsw", 512 | 2), ("ivf", 1 | 2), ("ivfpq", 1 | 2)],
+)
+def test_read_index_maps_ivf_lists_and_flat_codes_with_their_own_flags(index_type: str, expected_flags: int) -> None:
+    read_flags: list[int | None] = []
+    fake_faiss = SimpleNamespace(
+        IO_FLAG_MMAP=1,
+        IO_FLAG_READ_ONLY=2,
+        IO_FLAG_MMAP_IFC=512,
+        read_index=lambda path, io_flags=None: read_flags.append(io_flags),
+    )
+
+    _read_index(fake_faiss, "guidelines.index", index_type)
+    # FAISS releases without IO_FLAG_MMAP_IFC cannot map flat codes, so those indexes are read into memory.
+    del fake_faiss.IO_FLAG_MMAP_IFC
+    _read_index(fake_faiss, "guidelines.index", index_type)
+
+    assert read_flags == [expected_flags, expected_flags if index_type in ("ivf", "ivfpq") else None]
+
+
+def test_ondisk_ivf_is_opt_in_and_always_memory_mapped(tmp_path: Path, monkeypatch) -> None:
+    read_flags: list[int | None] = []
+    ondisk_paths: list[str] = []
+
+    class _FakeIVF(_FakeIVFPQ):
+        code_size = 8
+
+        def __init__(self, dim: int, nlist: int) -> None:
+            super().__init__(dim, f"IVF{nlist},Flat")
+            self.nlist = nlist
+            self.invlists = None
+
+        def replace_invlists(self, invlists, own: bool) -> None:
+            self.invlists = invlists
+
+    class _IVFFakeFaiss(_FakeFaiss):
+        IO_FLAG_MMAP = 1
+        IO_FLAG_READ_ONLY = 2
+        IO_FLAG_ONDISK_SAME_DIR = 4
+
+        def IndexIVFFlat(self, quantizer, dim: int, nlist: int, metric: int) -> _FakeIVF:
+            self.index = _FakeIVF(dim, nlist)
+            return self.index
+
+        @staticmethod
+        def OnDiskInvertedLists(nlist: int, code_size: int, path: str) -> object:
+            ondisk_paths.append(path)
+            Path(path).touch()
+            return SimpleNamespace(this=SimpleNamespace(disown=lambda: None))
+
+        @staticmethod
+        def read_index(path: str, io_flags: int | None = None) -> SimpleNamespace:
+            read_flags.append(io_flags)
+            return SimpleNamespace(**_FakeFaiss.read_index(path))
+
+    monkeypatch.setattr("app.data.ingestion.pipeline._get_faiss_module", lambda: _IVFFakeFaiss())
+    records = [{"id": str(i), "text": "x" * (i + 1), "metadata": {}} for i in range(16)]
+
+    index_path, metadata_path = build_faiss_index(
+        records, output_dir=tmp_path / "in_memory", embedding_client=_FakeClient(), index_type="ivf"
+    )
+    assert ondisk_paths == []
+    assert "invlists_file" not in json.loads(metadata_path.read_text(encoding="utf-8"))
+
+    index_path, metadata_path = build_faiss_index(
+        records, output_dir=tmp_path / "on_disk", embedding_client=_FakeClient(), index_type="ivf", ondisk_ivf=True
+    )
+    index, metadata = load_faiss_index(index_path, metadata_path)
+
+    assert ondisk_paths == [str(tmp_path / "on_disk" / metadata["invlists_file"])]
+    assert read_flags == [4 | 2]
+    assert index.nprobe == IVF_NPROBE
+    with pytest.raises(ValueError, match="mmap=True"):
+        load_faiss_index(index_path, metadata_path, mmap=False)
+    with pytest.raises(ValueError, match="ondisk_ivf requires"):
+        build_faiss_index(records, output_dir=tmp_path, embedding_client=_FakeClient(), ondisk_ivf=True)
+
+
+@pytest.fixture(scope="module")
+def real_faiss_index_files(tmp_path_factory) -> tuple[Path, Path]:
+    pytest.importorskip("faiss")
+    records = [{"id": f"chunk-{i}", "text": "x" * (i + 1), "metadata": {}} for i in range(8)]
+    return build_faiss_index(records, output_dir=tmp_path_factory.mktemp("faiss"), embedding_client=_FakeClient())
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_real_faiss_index_loads_with_and_without_mmap(real_faiss_index_files, mmap: bool) -> None:
+    index_path, metadata_path = real_faiss_index_files
+
+    index, metadata = load_faiss_index(index_path, metadata_path, mmap=mmap)
+
+    assert index.ntotal == len(metadata["records"]) == 8
+
+
+def test_int8_precision_scores_close_to_fp32(tmp_path: Path) -> None:
+    pytest.importorskip("faiss")
+    records = [{"id": f"chunk-{i}", "text": "x" * (i + 1), "metadata": {}} for i in range(8)]
+    query = np.asarray([[1 / math.sqrt(5), 2 / math.sqrt(5)]], dtype=np.float32)
+
+    scores_by_precision = {}
+    for precision in ("fp32", "int8"):
+        output_dir = tmp_path / precision
+        build_faiss_index(records, output_dir=output_dir, embedding_client=_FakeClient(), precision=precision)
+        index, metadata = load_faiss_index(output_dir / "guidelines.index", output_dir / "guidelines_metadata.json")
+        assert metadata["precision"] == precision
+        scores, ids = index.search(query, len(records))
+        scores_by_precision[precision] = dict(zip(ids[0].tolist(), scores[0].tolist()))
+
+    assert scores_by_precision["int8"].keys() == scores_by_precision["fp32"].keys()
+    for chunk_index, fp32_score in scores_by_precision["fp32"].items():
+        assert scores_by_precision["int8"][chunk_index] == pytest.approx(fp32_score, abs=2e-2)
+
+
+def test_binary_precision_rescores_candidates_with_fp32_vectors(tmp_path: Path) -> None:
+    pytest.importorskip("faiss")
+    records = [{"id": f"chunk-{i}", "text": "x" * (i + 1), "metadata": {}} for i in range(8)]
+
+    index_path, metadata_path = build_faiss_index(
+        records,
+        output_dir=tmp_path,
+        embedding_client=_FakeClient(),
+        precision="binary",
+    )
+    index, metadata = load_faiss_index(index_path, metadata_path)
+
+    assert metadata["precision"] == "binary"
+    assert (tmp_path / metadata["vectors_file"]).exists()
+    scores, ids = index.search([[1 / math.sqrt(5), 2 / math.sqrt(5)]], 2)
+    assert ids[0].tolist() == [0, 1]
+    assert 0.9 < scores[0][0] <= 1.0 + 1e-6
+
+
+def test_ivf_index_keeps_posting_lists_on_disk_and_survives_a_move(tmp_path: Path) -> None:
+    pytest.importorskip("faiss")
+    records = [{"id": f"chunk-{i}", "text": "x" * (i + 1), "metadata": {}} for i in range(64)]
+    build_dir = tmp_path / "build"
+    build_faiss_index(records, output_dir=build_dir, embedding_client=_FakeClient(), index_type="ivf", ondisk_ivf=True)
+
+    moved_dir = build_dir.rename(tmp_path / "moved")
+    index, metadata = load_faiss_index(moved_dir / "guidelines.index", moved_dir / "guidelines_metadata.json")
+
+    assert (moved_dir / metadata["invlists_file"]).exists()
+    assert index.ntotal == 64
+    _, ids = index.search(np.asarray([[1 / math.sqrt(5), 2 / math.sqrt(5)]], dtype=np.float32), 1)
+    assert ids[0][0] == 0
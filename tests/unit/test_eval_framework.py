@@ -1,53 +1,22 @@
 from __future__ import annotations
 
+import asyncio
 import csv
 from pathlib import Path
 
-from app.eval.framework import evaluate_retrieval, load_gold_questions, write_metrics_csv
+from app.eval.framework import (
+    GoldQuestion,
+    _latency_summary,
+    evaluate_retrieval,
+    load_gold_questions,
+    write_metrics_csv,
+)
+from tests._fakes import FakeClient, FakeIndex
 
 
 ROOT = Path(__file__).resolve().parents[2]
 
 
-class _FakeEmbeddingItem:
-    def __init__(self, embedding: list[float]) -> None:
-        self.embedding = embedding
-
-
-class _FakeEmbeddingResponse:
-    def __init__(self, data: list[_FakeEmbeddingItem]) -> None:
-        self.data = data
-
-
-class _FakeEmbeddingsAPI:
-    def __init__(self, vector: list[float]) -> None:
-        self._vector = vector
-
-    def create(self, model: str, input: list[str]) -> _FakeEmbeddingResponse:
-        return _FakeEmbeddingResponse([_FakeEmbeddingItem(self._vector)])
-
-
-class _FakeClient:
-    def __init__(self, vector: list[float]) -> None:
-        self.embeddings = _FakeEmbeddingsAPI(vector)
-
-
-class _FakeIndex:
-    def __init__(self, vectors: list[list[float]]) -> None:
-        self.vectors = vectors
-
-    def search(self, query_vector, top_k: int):
-        query = query_vector[0]
-        ranked = []
-        for idx, row in enumerate(self.vectors):
-            score = sum(a * b for a, b in zip(query, row))
-            ranked.append((idx, score))
-
-        ranked.sort(key=lambda item: item[1], reverse=True)
-        selected = ranked[:top_k]
-        return [[score for _, score in selected]], [[idx for idx, _ in selected]]
-
-
 def test_gold_dataset_contains_cmpa_questions() -> None:
     questions = load_gold_questions(ROOT / "eval" / "gold_questions_cmpa.csv")
     assert 40 <= len(questions) <= 50
@@ -72,10 +41,10 @@ def test_evaluate_computes_expected_metrics(tmp_path: Path) -> None:
 
     metrics = evaluate_retrieval(
         load_gold_questions(gold_path),
-        _FakeIndex([[1.0, 0.0], [0.0, 1.0]]),
+        FakeIndex([[1.0, 0.0], [0.0, 1.0]]),
         metadata,
         embedding_model="fake",
-        embedding_client=_FakeClient([1.0, 0.0]),
+        embedding_client=FakeClient([1.0, 0.0]),
         top_k=2,
         min_similarity=0.0,
     )
@@ -86,5 +55,81 @@ def test_evaluate_computes_expected_metrics(tmp_path: Path) -> None:
     assert metrics.refusal_rate == 0.0
     assert metrics.avg_response_time_ms >= 0
 
+    assert metrics.concurrency == 1
+
     write_metrics_csv(metrics, metrics_path)
-    assert metrics_path.exists()
+    assert ["concurrency", "1"] in list(csv.reader(metrics_path.read_text(encoding="utf-8").splitlines()))
+
+    per_query_metrics = evaluate_retrieval(
+        load_gold_questions(gold_path),
+        FakeIndex([[1.0, 0.0], [0.0, 1.0]]),
+        metadata,
+        embedding_model="fake",
+        embedding_client=FakeClient([1.0, 0.0]),
+        top_k=2,
+        min_similarity=0.0,
+        precomputed_embeddings=False,
+    )
+    assert per_query_metrics.retrieval_accuracy_topk == metrics.retrieval_accuracy_topk
+    assert per_query_metrics.retrieval_accuracy_top1 == metrics.retrieval_accuracy_top1
+
+
+def test_latency_summary_reports_interpolated_p95() -> None:
+    avg_ms, p95_ms = _latency_summary([value * 1_000_000 for value in range(1, 21)])
+
+    assert avg_ms == 10.5
+    assert abs(p95_ms - 19.05) < 1e-9
+    assert _latency_summary([3_000_000]) == (3.0, 3.0)
+
+
+def test_gold_question_compiles_keyword_alternation() -> None:
+    case = GoldQuestion(question="q", expected_keywords=("casein", "a+b"), expected_section="ingredients")
+
+    assert case.keyword_pattern.search("label lists a+b") is not None
+    assert case.keyword_pattern.search("whey only") is None
+    assert GoldQuestion("q", (), "ingredients").keyword_pattern.search("anything") is None
+
+
+def test_evaluate_runs_sequentially_inside_a_running_event_loop() -> None:
+    questions = [GoldQuestion("what is cmpa", ("cmpa",), "definition")]
+    metadata = {"records": [{"id": "C1", "text": "CMPA definition", "metadata": {"section": "تعريف"}}]}
+
+    async def evaluate_from_async_code():
+        return evaluate_retrieval(
+            questions,
+            FakeIndex([[1.0, 0.0]]),
+            metadata,
+            embedding_model="fake",
+            embedding_client=FakeClient([1.0, 0.0]),
+            top_k=1,
+            min_similarity=0.0,
+            max_concurrency=4,
+        )
+
+    metrics = asyncio.run(evaluate_from_async_code())
+
+    assert metrics.retrieval_accuracy_top1 == 1.0
+    assert metrics.concurrency == 1
+
+
+def test_chunks_with_empty_ids_are_matched_on_their_own_text() -> None:
+    questions = [GoldQuestion("what are red flags", ("anaphylaxis",), "red_flags")]
+    metadata = {
+        "records": [
+            {"id": "", "text": "CMPA definition", "metadata": {"section": "تعريف"}},
+            {"id": "", "text": "Anaphylaxis red flags", "metadata": {"section": "علامات حمراء"}},
+        ]
+    }
+
+    metrics = evaluate_retrieval(
+        questions,
+        FakeIndex([[1.0, 0.0], [0.9, 0.0]]),
+        metadata,
+        embedding_model="fake",
+        embedding_client=FakeClient([1.0, 0.0]),
+        top_k=2,
+        min_similarity=0.0,
+    )
+
+    assert metrics.retrieval_accuracy_topk == 1.0
+    assert metrics.retrieval_accuracy_top1 == 0.0
@@ -19,7 +19,7 @@ Third sentence is here. Fourth sentence is here.
 
     records = ingest_guidelines(
         sample,
-        config=IngestionConfig(chunk_size_tokens=8, overlap_ratio=0.15),
+        config=IngestionConfig(chunk_size_tokens=8, overlap_ratio=0.15, include_section_prefix=True),
     )
 
     assert records
@@ -40,3 +40,55 @@ Third sentence is here. Fourth sentence is here.
     if len(records) > 1:
         prior_last = records[0]["text"].split()[-1]
         assert prior_last in records[1]["text"]
+
+
+def test_ingest_guidelines_keeps_section_out_of_chunk_text_by_default(tmp_path: Path) -> None:
+    sample = tmp_path / "guideline.txt"
+    sample.write_text("INTRODUCTION\nThis is a sentence.", encoding="utf-8")
+
+    records = ingest_guidelines(sample)
+
+    assert records[0]["text"] == "This is a sentence."
+    assert records[0]["metadata"]["section"] == "INTRODUCTION"
+
+
+def test_ingest_guidelines_window_strategy_slides_fixed_token_windows(tmp_path: Path) -> None:
+    sample = tmp_path / "window_guideline.txt"
+    sample.write_text("INTRODUCTION\none two three four five six seven eight nine ten", encoding="utf-8")
+
+    records = ingest_guidelines(
+        sample,
+        config=IngestionConfig(chunk_size_tokens=4, overlap_ratio=0.25, chunk_strategy="window"),
+    )
+
+    assert [r["text"] for r in records] == [
+        "one two three four",
+        "four five six seven",
+        "seven eight nine ten",
+    ]
+
+
+def test_ingest_guidelines_directory_matches_per_file_ingestion(tmp_path: Path) -> None:
+    for i in range(10):
+        (tmp_path / f"guideline_{i:02d}.txt").write_text(
+            f"SECTION {i}\nFirst sentence {i}. Second sentence {i}.",
+            encoding="utf-8",
+        )
+    config = IngestionConfig(chunk_size_tokens=8, overlap_ratio=0.15)
+
+    records = ingest_guidelines(tmp_path, config=config)
+
+    expected = [
+        record
+        for path in sorted(tmp_path.glob("*.txt"))
+        for record in ingest_guidelines(path, config=config)
+    ]
+    assert records == expected
+
+
+def test_estimate_token_count_matches_exact_count_for_plain_sentences() -> None:
+    from app.data.ingestion.text_processing import estimate_token_count, token_count
+
+    sentence = "Avoid milk, check labels (casein, whey) and follow up in 2 weeks."
+
+    assert estimate_token_count(sentence) == token_count(sentence)
@@ -1,136 +1,227 @@
 from __future__ import annotations
 
+import gc
 import math
+import re
+import weakref
+from dataclasses import dataclass
 
-from app.data.retrieval import retrieve_chunks
+import pytest
 
+from app.data.ingestion.models import ChunkRecords
+from app.data.ingestion.pipeline import build_faiss_index, load_faiss_index
+from app.data.retrieval import embed_queries, embed_query, retrieve_chunks
+from tests._fakes import FakeClient, FakeIndex
 
-class _FakeEmbeddingItem:
-    def __init__(self, embedding: list[float]) -> None:
-        self.embedding = embedding
 
+# Unit length, so retrieval's query normalization (applied when FAISS is installed) leaves them unchanged.
+_STRONG_VECTOR = [1.0, 0.0]
+_WEAK_VECTOR = [0.2, math.sqrt(0.96)]
 
-class _FakeEmbeddingResponse:
-    def __init__(self, data: list[_FakeEmbeddingItem]) -> None:
-        self.data = data
 
+def _strong_or_weak(query: str) -> list[float]:
+    return _STRONG_VECTOR if "strong" in query else _WEAK_VECTOR
 
-class _FakeEmbeddingsAPI:
-    def create(self, model: str, input: list[str]) -> _FakeEmbeddingResponse:
-        query = input[0]
-        if "strong" in query:
-            vector = [1.0, 0.0]
-        else:
-            vector = [0.2, 0.0]
-        return _FakeEmbeddingResponse([_FakeEmbeddingItem(vector)])
 
+@pytest.fixture(scope="module")
+def client() -> FakeClient:
+    return FakeClient(_strong_or_weak)
 
-class _FakeClient:
-    def __init__(self) -> None:
-        self.embeddings = _FakeEmbeddingsAPI()
 
+@pytest.fixture(scope="module")
+def metadata() -> dict[str, object]:
+    # Columnar, like the records load_faiss_index returns; retrieval only reads it, so tests can share it.
+    return {
+        "records": ChunkRecords(
+            ids=["chunk-1", "chunk-2", "chunk-3", "chunk-4", "chunk-5", "chunk-6"],
+            texts=["first", "second", "third", "fourth", "fifth", "sixth"],
+            metadata={"section": ["A", "B", "C", "D", "E", "F"]},
+        )
+    }
 
-class _FakeIndex:
-    def __init__(self, vectors: list[list[float]]) -> None:
-        self.vectors = vectors
 
-    def search(self, query_vector, top_k: int):
-        q = query_vector[0]
-        similarities = []
-        for i, row in enumerate(self.vectors):
-            score = sum(a * b for a, b in zip(q, row))
-            similarities.append((i, score))
+@pytest.fixture(scope="module")
+def index() -> FakeIndex:
+    return FakeIndex(vectors=[[1.0, 0.0], [0.9, 0.0], [0.8, 0.0], [0.7, 0.0], [0.6, 0.0], [0.5, 0.0]])
 
-        similarities.sort(key=lambda item: item[1], reverse=True)
-        selected = similarities[:top_k]
 
-        distances = [[score for _, score in selected]]
-        indices = [[idx for idx, _ in selected]]
-        return distances, indices
+@pytest.fixture(scope="module")
+def weak_index() -> FakeIndex:
+    # Unit rows, like the ones build_faiss_index stores, so the weak query scores its cosine of 0.2.
+    return FakeIndex(vectors=[[1.0, 0.0], [1.0, 0.0], [1.0, 0.0]])
 
 
-def _metadata() -> dict[str, object]:
-    return {
-        "records": [
-            {"id": "chunk-1", "text": "first", "metadata": {"section": "A"}},
-            {"id": "chunk-2", "text": "second", "metadata": {"section": "B"}},
-            {"id": "chunk-3", "text": "third", "metadata": {"section": "C"}},
-            {"id": "chunk-4", "text": "fourth", "metadata": {"section": "D"}},
-            {"id": "chunk-5", "text": "fifth", "metadata": {"section": "E"}},
-            {"id": "chunk-6", "text": "sixth", "metadata": {"section": "F"}},
-        ]
-    }
+def _build_index(tmp_path_factory, records: ChunkRecords, vectors: list[list[float]], index_type: str) -> object:
+    """Build and load a real FAISS index for the first ``len(vectors)`` records through the pipeline."""
+    pytest.importorskip("faiss")
+    vectors_by_text = dict(zip(records.texts, vectors))
+    index_path, metadata_path = build_faiss_index(
+        [{"id": chunk_id, "text": text, "metadata": {}} for chunk_id, text in zip(records.ids, vectors_by_text)],
+        output_dir=tmp_path_factory.mktemp(index_type),
+        embedding_client=FakeClient(vectors_by_text.__getitem__),
+        index_type=index_type,
+    )
+    index, _ = load_faiss_index(index_path, metadata_path)
+    return index
 
 
-def test_retrieval_returns_top_5_with_similarity_scores_and_logs(caplog) -> None:
-    index = _FakeIndex(
-        vectors=[
-            [1.0, 0.0],
-            [0.9, 0.0],
-            [0.8, 0.0],
-            [0.7, 0.0],
-            [0.6, 0.0],
-            [0.5, 0.0],
-        ]
-    )
+@pytest.fixture(scope="module")
+def normalized_index(tmp_path_factory, metadata) -> object:
+    # Raw inner products against the strong query are 0.5, 0.4 and 0.0, all below the threshold;
+    # the pipeline's row normalization turns them into cosine scores.
+    return _build_index(tmp_path_factory, metadata["records"], [[0.5, 0.5], [0.4, 0.0], [0.0, 0.3]], "flat")
 
-    caplog.set_level("INFO")
-    result = retrieve_chunks(
+
+@pytest.fixture(scope="module")
+def hnsw_index(tmp_path_factory, metadata) -> object:
+    # Distinct directions, so the ranking survives the row normalization the pipeline applies.
+    vectors = [[1.0, 0.1 * position] for position in range(len(metadata["records"]))]
+    return _build_index(tmp_path_factory, metadata["records"], vectors, "hnsw")
+
+
+@dataclass(frozen=True)
+class _Case:
+    index_fixture: str
+    query: str
+    top_k: int = 5
+    expected_ids: tuple[str, ...] = ()
+    expected_scores: tuple[float, ...] = ()
+    expected_max_similarity: float | None = None
+    # Below 1.0 the index is approximate: only recall@k is checked, not exact order or scores.
+    min_recall: float = 1.0
+    error: str | None = None
+
+
+_CASES = {
+    "top_5_above_threshold": _Case(
+        index_fixture="index",
         query="strong match",
-        index=index,
-        metadata=_metadata(),
-        embedding_client=_FakeClient(),
-    )
+        expected_ids=("chunk-1", "chunk-2", "chunk-3", "chunk-4", "chunk-5"),
+        expected_scores=(1.0, 0.9, 0.8, 0.7, 0.6),
+    ),
+    "top_5_hnsw": _Case(
+        index_fixture="hnsw_index",
+        query="strong match",
+        expected_ids=("chunk-1", "chunk-2", "chunk-3", "chunk-4", "chunk-5"),
+        min_recall=0.8,
+    ),
+    "rejected_below_threshold": _Case(index_fixture="weak_index", query="weak match", expected_max_similarity=0.2),
+    "normalized_vectors_score_as_cosine": _Case(
+        index_fixture="normalized_index",
+        query="strong match",
+        top_k=3,
+        expected_ids=("chunk-2", "chunk-1", "chunk-3"),
+        expected_scores=(1.0, math.sqrt(0.5), 0.0),
+    ),
+    "invalid_top_k": _Case(index_fixture="index", query="strong match", top_k=0, error="top_k must be greater than zero."),
+}
+
+
+@pytest.mark.parametrize("case", _CASES.values(), ids=_CASES.keys())
+def test_retrieval_cases(request, case: _Case, metadata, client) -> None:
+    kwargs = {
+        "query": case.query,
+        "index": request.getfixturevalue(case.index_fixture),
+        "metadata": metadata,
+        "embedding_client": client,
+        "top_k": case.top_k,
+    }
 
-    assert result["rejected"] is False
-    assert len(result["retrieved"]) == 5
-    assert [item["id"] for item in result["retrieved"]] == [
-        "chunk-1",
-        "chunk-2",
-        "chunk-3",
-        "chunk-4",
-        "chunk-5",
-    ]
-    assert result["similarity_scores"] == [1.0, 0.9, 0.8, 0.7, 0.6]
+    if case.error is not None:
+        with pytest.raises(ValueError, match=f"^{re.escape(case.error)}$"):
+            retrieve_chunks(**kwargs)
+        return
+
+    result = retrieve_chunks(**kwargs)
+    assert result["rejected"] is (not case.expected_ids)
+    retrieved_ids = [item["id"] for item in result["retrieved"]]
+    if case.min_recall < 1.0:
+        recall = len(set(retrieved_ids) & set(case.expected_ids)) / len(case.expected_ids)
+        assert recall >= case.min_recall
+        return
+    assert retrieved_ids == list(case.expected_ids)
+    # Scores are float32 when NumPy is installed, as they are from FAISS.
+    if case.expected_scores:
+        assert result["similarity_scores"] == pytest.approx(case.expected_scores, rel=1e-6)
+    if case.expected_max_similarity is not None:
+        assert math.isclose(result["max_similarity"], case.expected_max_similarity, rel_tol=1e-6)
+
+
+def test_retrieval_logs_query_ids_and_scores(caplog, index, metadata, client) -> None:
+    caplog.set_level("INFO")
+    retrieve_chunks(query="strong match", index=index, metadata=metadata, embedding_client=client)
+
+    messages = {record.getMessage() for record in caplog.records if record.name == "app.data.retrieval"}
+    assert {
+        "Retrieval query: strong match",
+        "Retrieved chunk ids: ['chunk-1', 'chunk-2', 'chunk-3', 'chunk-4', 'chunk-5']",
+        "Similarity scores: [1.0, 0.9, 0.8, 0.7, 0.6]",
+    } <= messages
+
+
+def test_retrieval_reuses_cached_query_embedding() -> None:
+    client = FakeClient(_strong_or_weak)
+    index = FakeIndex(vectors=[[1.0, 0.0]])
+    metadata = {"records": [{"id": "chunk-1", "text": "first", "metadata": {}}]}
+
+    first = retrieve_chunks(query="strong match", index=index, metadata=metadata, embedding_client=client)
+    second = retrieve_chunks(query="  strong   match ", index=index, metadata=metadata, embedding_client=client)
 
-    assert "Retrieval query: strong match" in caplog.text
-    assert "Retrieved chunk ids: ['chunk-1', 'chunk-2', 'chunk-3', 'chunk-4', 'chunk-5']" in caplog.text
-    assert "Similarity scores: [1.0, 0.9, 0.8, 0.7, 0.6]" in caplog.text
+    assert client.embeddings.calls == 1
+    assert first["similarity_scores"] == second["similarity_scores"]
 
 
-def test_retrieval_rejects_when_max_similarity_is_below_threshold() -> None:
-    index = _FakeIndex(vectors=[[0.5, 0.0], [0.4, 0.0], [0.3, 0.0]])
+def test_retrieved_items_always_carry_metadata_dict() -> None:
+    metadata = {"records": [{"id": "chunk-1", "text": "first"}, {"id": "chunk-2", "text": "second", "metadata": None}]}
 
     result = retrieve_chunks(
-        query="weak match",
-        index=index,
-        metadata={
-            "records": [
-                {"id": "chunk-1", "text": "first", "metadata": {}},
-                {"id": "chunk-2", "text": "second", "metadata": {}},
-                {"id": "chunk-3", "text": "third", "metadata": {}},
-            ]
-        },
-        embedding_client=_FakeClient(),
+        query="strong metadata check",
+        index=FakeIndex(vectors=[[1.0, 0.0], [0.9, 0.0]]),
+        metadata=metadata,
+        embedding_client=FakeClient(_strong_or_weak),
+        top_k=2,
+        min_similarity=0.1,
     )
 
-    assert result["rejected"] is True
-    assert result["retrieved"] == []
-    assert math.isclose(result["max_similarity"], 0.1)
+    assert [item["metadata"] for item in result["retrieved"]] == [{}, {}]
 
 
-def test_retrieval_validates_top_k() -> None:
-    index = _FakeIndex(vectors=[[1.0, 0.0]])
+def test_embed_query_propagates_client_errors_without_retrying() -> None:
+    class _BrokenEmbeddingsAPI:
+        calls = 0
 
-    try:
-        retrieve_chunks(
-            query="strong match",
-            index=index,
-            metadata={"records": [{"id": "chunk-1", "text": "first", "metadata": {}}]},
-            embedding_client=_FakeClient(),
-            top_k=0,
-        )
-    except ValueError as exc:
-        assert str(exc) == "top_k must be greater than zero."
-    else:
-        raise AssertionError("ValueError was not raised for invalid top_k")
+        def create(self, model: str, input: list[str]):
+            type(self).calls += 1
+            raise TypeError("unexpected keyword argument")
+
+    client = FakeClient(_strong_or_weak)
+    client.embeddings = _BrokenEmbeddingsAPI()
+
+    with pytest.raises(TypeError, match="unexpected keyword argument"):
+        embed_query("strong broken client", embedding_client=client)
+    assert _BrokenEmbeddingsAPI.calls == 1
+
+
+def test_query_cache_does_not_keep_clients_alive() -> None:
+    client = FakeClient(_strong_or_weak)
+    client_ref = weakref.ref(client)
+    embed_query("strong lifetime check", embedding_client=client)
+
+    del client
+    gc.collect()
+
+    assert client_ref() is None
+
+
+def test_embed_queries_normalizes_whitespace_like_embed_query() -> None:
+    embedded_texts: list[str] = []
+
+    def record_text(text: str) -> list[float]:
+        embedded_texts.append(text)
+        return _strong_or_weak(text)
+
+    client = FakeClient(record_text)
+    embed_query("  strong \n batch\tcheck ", embedding_client=client)
+    embed_queries(["  strong \n batch\tcheck ", "weak   one"], embedding_client=client)
+
+    assert embedded_texts == ["strong batch check", "strong batch check", "weak one"]